@@ -0,0 +1,60 @@
+'''
+Compare rendering a run frame by frame with plotFlowFile
+against the incremental updates of FlowAnimator on synthetic flow files,
+both rendered with the Agg backend
+
+usage: python benchmarks/bench_animate.py [nframes] [nflows]
+'''
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from flowplot.plots import FlowAnimator, plotFlowFile
+
+from synthetic import writeFlowFile
+
+
+def perFrame(paths):
+    '''
+    returns the wall time per frame of a new figure with plotFlowFile for every file
+    '''
+    start = time.perf_counter()
+    for path in paths:
+        fig, ax = plt.subplots(figsize=(14, 10))
+        plotFlowFile(ax, path)
+        fig.canvas.draw()
+        plt.close(fig)
+    return (time.perf_counter() - start)/len(paths)
+
+
+def animated(paths):
+    '''
+    returns the wall time per frame of FlowAnimator updating one figure
+    '''
+    fig, ax = plt.subplots(figsize=(14, 10))
+    animator = FlowAnimator(ax, paths)
+    start = time.perf_counter()
+    for frame in range(len(paths)):
+        animator.update(frame)
+        fig.canvas.draw()
+    elapsed = time.perf_counter() - start
+    animator.close()
+    plt.close(fig)
+    return elapsed/len(paths)
+
+
+if __name__ == '__main__':
+    nframes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    nflows = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, 'flow_{:04d}.dat'.format(ii+1)) for ii in range(nframes)]
+        for ii, path in enumerate(paths):
+            writeFlowFile(path, nflows, time=1e-3*(ii+1), dt=1e-3, seed=ii)
+
+        print("{} frames, {} flows".format(nframes, nflows))
+        print("plotFlowFile  {:7.3f} s/frame".format(perFrame(paths)))
+        print("FlowAnimator  {:7.3f} s/frame".format(animated(paths)))
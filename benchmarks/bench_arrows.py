@@ -0,0 +1,46 @@
+'''
+Compare the FancyArrow PatchCollection of FlowCollectionPlot (fast=False)
+against the vectorized PolyCollection (fast=True) on a synthetic flow file,
+timing construction and drawing with the Agg backend
+
+usage: python benchmarks/bench_arrows.py [nflows]
+'''
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from flowplot.flow import FlowFile
+from flowplot.plots import FlowCollectionPlot
+
+from synthetic import writeFlowFile
+
+
+def timePlot(flowfile, fast):
+    '''
+    returns wall time to build and to draw a FlowCollectionPlot of all flows
+    '''
+    fig, ax = plt.subplots(figsize=(14, 14))
+    start = time.perf_counter()
+    FlowCollectionPlot(ax, flowfile, frange='all', fast=fast)
+    built = time.perf_counter()
+    fig.canvas.draw()
+    drawn = time.perf_counter()
+    plt.close(fig)
+    return built - start, drawn - built
+
+
+if __name__ == '__main__':
+    nflows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'flow_0001.dat')
+        writeFlowFile(path, nflows, dt=1e-3)
+        flowfile = FlowFile(path)
+
+    print("{} flows".format(len(flowfile.flow)))
+    for fast in (False, True):
+        build, draw = min(timePlot(flowfile, fast) for _ in range(3))
+        print("fast={!s:5}  build: {:7.3f} s  draw: {:7.3f} s".format(fast, build, draw))
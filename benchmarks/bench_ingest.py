@@ -0,0 +1,65 @@
+'''
+Compare building a FlowCollection row by row with addFlowFromZN
+against the vectorized ingest of FlowFile on a synthetic flow file
+
+usage: python benchmarks/bench_ingest.py [nflows]
+'''
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from flowplot.flow import FlowFile
+from flowplot.flow.flowcollection import FlowCollection
+
+from synthetic import writeFlowFile
+
+
+def rowIngest(path, ymin=1e-20, flmin=0):
+    '''
+    the row by row ingest FlowFile used before the vectorized one
+    '''
+    col = FlowCollection()
+    nins, zins, yins, nouts, zouts, youts, fls = np.loadtxt(path, skiprows=3, unpack=True)
+    mfl = max(fls) * flmin
+    for nin, zin, yin, nout, zout, yout, fl in zip(nins, zins, yins, nouts, zouts, youts, fls):
+        if fl < mfl:
+            continue
+        if yin < ymin:
+            continue
+        if yout < ymin:
+            yout = -np.inf
+        col.addFlowFromZN(nin, zin, yin, nout, zout, yout, fl)
+    col.sort()
+    return col
+
+
+def best(func, *args, repeat=3):
+    '''
+    returns the result and best wall time out of repeat calls of func
+    '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = func(*args)
+        times.append(time.perf_counter() - start)
+    return res, min(times)
+
+
+if __name__ == '__main__':
+    nflows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'flow_0001.dat')
+        writeFlowFile(path, nflows, dt=1e-3)
+
+        _, t_parse = best(lambda p: np.loadtxt(p, skiprows=3), path)
+        rows, t_rows = best(rowIngest, path)
+        bulk, t_bulk = best(FlowFile, path)
+        assert np.allclose(np.sort(rows.flow), np.sort(bulk.flow))
+
+        print("{} flows on {} nuclei".format(len(bulk.flow), len(bulk.N)))
+        print("row by row:  {:8.3f} s".format(t_rows))
+        print("vectorized:  {:8.3f} s".format(t_bulk))
+        print("speedup:     {:8.1f}x".format(t_rows/t_bulk))
+        print("of which np.loadtxt takes {:.3f} s".format(t_parse))
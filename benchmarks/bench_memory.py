@@ -0,0 +1,102 @@
+'''
+Compare the memory of the Flow and Isotope objects of an integrated
+FlowCollection with the objects used before (one __dict__ per object,
+new Isotope objects with abundance and flow lists for every collection)
+against the interned Isotopes and the FlowArray of slotted Flow records,
+also with all Flow records held in a list
+
+usage: python benchmarks/bench_memory.py [nflows]
+'''
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import numpy as np
+from flowplot import getName
+from flowplot.flow import FlowFile
+
+from synthetic import writeFlowFile
+
+
+class LegacyIsotope(object):
+    '''
+    the Isotope used before, only the attributes
+    '''
+
+    def __init__(self, N, Z, Y):
+        self.Z, self.N, self.A = Z, N, Z + N
+        self.name = getName(N, Z)
+        self.Name = self.name[0].upper() + self.name[1:]
+        self.el, self.El = self.name.rstrip('0123456789'), self.Name.rstrip('0123456789')
+        self.Y = Y
+
+
+class LegacyFlow(object):
+    '''
+    the Flow used before
+    '''
+
+    def __init__(self, iso_in, iso_out, flow):
+        self.Z0 = iso_in.Z
+        self.N0 = iso_in.N
+        self.dZ = iso_out.Z - iso_in.Z
+        self.dN = iso_out.N - iso_in.N
+        self.flow = flow
+        self.iso_in = iso_in
+        self.iso_out = iso_out
+
+
+def legacyObjects(col):
+    '''
+    builds the objects like FlowCollection.flows did before
+    '''
+    isos = np.empty(len(col.N), dtype=object)
+    for ii, (N, Z, Y) in enumerate(zip(col.N.tolist(), col.Z.tolist(), col.Y.tolist())):
+        isos[ii] = LegacyIsotope(N, Z, Y)
+    flows = np.empty(len(col.flow), dtype=object)
+    for ii, (i_in, i_out, fl) in enumerate(zip(col.iso_in.tolist(), col.iso_out.tolist(), col.flow.tolist())):
+        flows[ii] = LegacyFlow(isos[i_in], isos[i_out], fl)
+    for ind, name in ((col.iso_out, 'flow_in'), (col.iso_in, 'flow_out')):
+        order = np.argsort(ind, kind='stable')
+        groups = np.split(flows[order], np.cumsum(np.bincount(ind, minlength=len(isos)))[:-1])
+        for iso, group in zip(isos, groups):
+            setattr(iso, name, group)
+    return isos, flows
+
+
+def traced(func, *args):
+    '''
+    returns the result of func and the memory allocated by it in bytes
+    '''
+    tracemalloc.start()
+    result = func(*args)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def currentObjects(col):
+    return col.isotopes, col.flows
+
+
+def allRecords(col):
+    return list(col.flows)
+
+
+if __name__ == '__main__':
+    nflows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, 'flow_{:04d}.dat'.format(ii+1)) for ii in range(2)]
+        for ii, path in enumerate(paths):
+            writeFlowFile(path, nflows, dt=1e-3, seed=ii)
+        col = FlowFile(paths[0]) + FlowFile(paths[1])
+
+    arrays = sum(arr.nbytes for arr in (col.N, col.Z, col.Y, col.iso_in, col.iso_out, col.flow))
+    _, legacy = traced(legacyObjects, col)
+    _, current = traced(currentObjects, col)
+    _, records = traced(allRecords, col)
+    print("{} flows, {} isotopes, arrays {:6.1f} MB".format(len(col.flow), len(col.N), arrays/1e6))
+    print("objects before   {:6.1f} MB".format(legacy/1e6))
+    print("objects now      {:6.1f} MB  ({:.1f}x less)".format(current/1e6, legacy/current))
+    print("list of records  {:6.1f} MB  ({:.1f}x less)".format(records/1e6, legacy/records))
@@ -0,0 +1,304 @@
+'''
+Benchmark suite on synthetic WinNet runs (see synthetic.writeRun)
+
+The classes follow the conventions of asv (airspeed velocity):
+setup is called with the parameters before every benchmark,
+time_* methods are timed and peakmem_* methods are measured for peak memory.
+They can be run by asv or by this script, which times every benchmark
+(best of repeat calls) and records its peak memory with tracemalloc.
+
+usage: python benchmarks/bench_suite.py [-n NFLOWS ...] [-r REPEAT] [-k FILTER]
+                                         [-o results.json] [-c baseline.json]
+with -c every benchmark more than 20% slower than in baseline is reported
+and the exit code is 1
+'''
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from flowplot.flow import FlowFile, IntegrateFlows
+from flowplot.flow import dirindex
+from flowplot.flow.snapshot import Snapshot
+from flowplot.flow.snapshotseries import SnapshotSeries
+from flowplot.plots import ScanDir, FlowCollectionPlot, IsotopeCollectionPlot
+
+from synthetic import writeRun
+
+NFILES = 10
+SIZES = [2000, 20000]
+
+# runs written so far, keyed by (nflows, dt)
+_runs = {}
+
+
+def getRun(nflows, dt=True):
+    '''
+    returns the directory of a synthetic run with NFILES files of nflows flows,
+    written once per process
+    '''
+    if (nflows, dt) not in _runs:
+        path = tempfile.mkdtemp(prefix='flowplot_bench_')
+        atexit.register(shutil.rmtree, path, True)
+        _runs[nflows, dt] = writeRun(path, nfiles=NFILES, nflows=nflows, dt=dt)
+    return _runs[nflows, dt]
+
+
+def _files(run, kind='flow'):
+    sub, prefix = ('flow', 'flow') if kind == 'flow' else ('snaps', 'snapsh')
+    return [os.path.join(run, sub, '{}_{:04d}.dat'.format(prefix, ii+1)) for ii in range(NFILES)]
+
+
+class Read(object):
+    '''
+    reading single flowfiles and snapshots
+    '''
+    params = SIZES
+    param_names = ['nflows']
+
+    def setup(self, nflows):
+        self.flow = _files(getRun(nflows))[-1]
+        self.flow_nodt = _files(getRun(nflows, dt=False))[-1]
+        self.snap = _files(getRun(nflows), 'snapsh')[-1]
+        # the DirIndex needed to reconstruct dt is built outside of the timings
+        FlowFile(self.flow_nodt)
+
+    def time_FlowFile(self, nflows):
+        FlowFile(self.flow)
+
+    def time_FlowFileTop(self, nflows):
+        FlowFile(self.flow, top=300)
+
+    def time_FlowFileNoDt(self, nflows):
+        FlowFile(self.flow_nodt)
+
+    def time_Snapshot(self, nflows):
+        Snapshot(self.snap)
+
+    def peakmem_FlowFile(self, nflows):
+        FlowFile(self.flow)
+
+
+class Collections(object):
+    '''
+    operations on FlowCollections
+    '''
+    params = SIZES
+    param_names = ['nflows']
+
+    def setup(self, nflows):
+        paths = _files(getRun(nflows))
+        self.first, self.last = FlowFile(paths[0]), FlowFile(paths[-1])
+        snaps = _files(getRun(nflows), 'snapsh')
+        self.snaps = Snapshot(snaps[0]), Snapshot(snaps[-1])
+        self.start = self.last.getIsotope(Z=self.last.Z0[-1], N=self.last.N0[-1]).name
+
+    def time_add(self, nflows):
+        self.first + self.last
+
+    def time_addSnapshots(self, nflows):
+        self.snaps[0] + self.snaps[1]
+
+    def time_getFlowsTo(self, nflows):
+        self.last._graph.clear()
+        self.last.getFlowsTo(self.start, 10)
+
+    def time_getFlowsFrom(self, nflows):
+        self.last._graph.clear()
+        self.last.getFlowsFrom(self.start, 10)
+
+    def peakmem_add(self, nflows):
+        self.first + self.last
+
+
+class Integrate(object):
+    '''
+    integrating all flowfiles of a run
+    '''
+    params = SIZES
+    param_names = ['nflows']
+
+    def setup(self, nflows):
+        self.paths = _files(getRun(nflows))
+
+    def time_IntegrateFlows(self, nflows):
+        IntegrateFlows(self.paths, quite=True, workers=None)
+
+    def time_IntegrateFlowsSerial(self, nflows):
+        IntegrateFlows(self.paths, quite=True, workers=1)
+
+    def time_IntegrateFlowsWeighted(self, nflows):
+        IntegrateFlows(self.paths, quite=True, workers=1, weight='dt', Tmax=3)
+
+    def peakmem_IntegrateFlowsSerial(self, nflows):
+        IntegrateFlows(self.paths, quite=True, workers=1)
+
+
+class Scan(object):
+    '''
+    scanning a run directory with ScanDir
+    '''
+    params = SIZES[:1]
+    param_names = ['nflows']
+
+    def setup(self, nflows):
+        self.path = os.path.join(getRun(nflows), 'flow')
+        ScanDir(self.path)
+
+    def time_ScanDir(self, nflows):
+        ScanDir(self.path)
+
+    def time_ScanDirCold(self, nflows):
+        # forget the index in this process and on disk
+        dirindex._indices.pop(os.path.abspath(self.path), None)
+        os.remove(os.path.join(self.path, dirindex.INDEX_NAME))
+        ScanDir(self.path)
+
+
+class Series(object):
+    '''
+    reading all snapshots of a run into a SnapshotSeries
+    '''
+    params = SIZES
+    param_names = ['nflows']
+
+    def setup(self, nflows):
+        self.path = os.path.join(getRun(nflows), 'snaps')
+        self.store = os.path.join(tempfile.mkdtemp(prefix='flowplot_bench_'), 'series')
+
+    def teardown(self, nflows):
+        shutil.rmtree(os.path.dirname(self.store), True)
+
+    def _build(self):
+        for ext in ('.npy', '.npz'):
+            if os.path.isfile(self.store + ext):
+                os.remove(self.store + ext)
+        return SnapshotSeries(self.path, store=self.store).abundance('fe56')
+
+    def time_SnapshotSeries(self, nflows):
+        self._build()
+
+    def peakmem_SnapshotSeries(self, nflows):
+        self._build()
+
+
+class Plot(object):
+    '''
+    drawing flows and abundances with the Agg backend
+    '''
+    params = SIZES
+    param_names = ['nflows']
+
+    def setup(self, nflows):
+        self.flowfile = FlowFile(_files(getRun(nflows))[-1])
+        self.snapshot = Snapshot(_files(getRun(nflows), 'snapsh')[-1])
+        self.fig, self.ax = plt.subplots(figsize=(14, 10))
+
+    def teardown(self, nflows):
+        plt.close(self.fig)
+
+    def _draw(self, cls, col, **kwargs):
+        self.ax.cla()
+        cls(self.ax, col, **kwargs)
+        self.fig.canvas.draw()
+
+    def time_FlowCollectionPlot(self, nflows):
+        self._draw(FlowCollectionPlot, self.flowfile)
+
+    def time_FlowCollectionPlotLod(self, nflows):
+        self._draw(FlowCollectionPlot, self.flowfile, lod=True)
+
+    def time_IsotopeCollectionPlot(self, nflows):
+        self._draw(IsotopeCollectionPlot, self.snapshot)
+
+    def peakmem_FlowCollectionPlot(self, nflows):
+        self._draw(FlowCollectionPlot, self.flowfile)
+
+
+BENCHMARKS = [Read, Collections, Integrate, Scan, Series, Plot]
+
+
+def best(func, repeat):
+    '''
+    returns the best wall time out of repeat calls of func
+    '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def peak(func):
+    '''
+    returns the peak memory in bytes allocated during a call of func
+    '''
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def runAll(sizes=None, repeat=3, select=''):
+    '''
+    runs all benchmarks whose name contains select,
+    returns dict of "Class.method(nflows)": seconds or bytes
+    '''
+    results = {}
+    for cls in BENCHMARKS:
+        for nflows in (sizes or cls.params):
+            names = [name for name in sorted(dir(cls)) if name.startswith(('time_', 'peakmem_'))
+                     and select in '{}.{}'.format(cls.__name__, name)]
+            for name in names:
+                bench = cls()
+                bench.setup(nflows)
+                try:
+                    method = getattr(bench, name)
+                    if name.startswith('time_'):
+                        value = best(lambda: method(nflows), repeat)
+                    else:
+                        value = peak(lambda: method(nflows))
+                finally:
+                    if hasattr(bench, 'teardown'):
+                        bench.teardown(nflows)
+                key = '{}.{}({})'.format(cls.__name__, name, nflows)
+                results[key] = value
+                if name.startswith('time_'):
+                    print("{:50s} {:10.2f} ms".format(key, value*1e3))
+                else:
+                    print("{:50s} {:10.2f} MB".format(key, value/2**20))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-n', '--nflows', type=int, nargs='+', help='network sizes, default {}'.format(SIZES))
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('-k', '--select', default='', help='only run benchmarks containing this')
+    parser.add_argument('-o', '--output', help='write the results to this json file')
+    parser.add_argument('-c', '--compare', help='json file of an earlier run to compare with')
+    args = parser.parse_args()
+
+    results = runAll(args.nflows, args.repeat, args.select)
+    if args.output:
+        with open(args.output, 'w') as ff:
+            json.dump(results, ff, indent=1)
+    if args.compare:
+        with open(args.compare) as ff:
+            baseline = json.load(ff)
+        slower = [(key, value/baseline[key]) for key, value in results.items()
+                  if baseline.get(key) and value > 1.2*baseline[key]]
+        for key, ratio in slower:
+            print("regression: {} {:.2f}x of baseline".format(key, ratio))
+        sys.exit(1 if slower else 0)
@@ -0,0 +1,96 @@
+'''
+Generator for synthetic WinNet output used by the benchmarks
+'''
+import os
+
+import numpy as np
+
+# (dN, dZ) of the reactions in the synthetic network:
+# (n,g), (g,n), beta-, beta-delayed neutron, (p,g), alpha decay, beta+
+CHANNELS = [(1, 0), (-1, 0), (-1, 1), (-2, 1), (0, 1), (-2, -2), (1, -1)]
+
+
+def makeNetwork(nflows, Zmax=100, seed=0):
+    '''
+    returns Nin, Zin, Nout, Zout of nflows distinct reactions on a band of
+    nuclei around the valley of stability up to Zmax
+    the band is widened until the network has enough reactions
+    '''
+    rng = np.random.default_rng(seed)
+    width = 10
+    while True:
+        Z = np.repeat(np.arange(2, Zmax+1), width)
+        N = (Z*1.3).astype(int) - width//2 + np.tile(np.arange(width), Zmax-1)
+        keep = N >= 1
+        Z, N = Z[keep], N[keep]
+        if len(Z)*len(CHANNELS) >= nflows:
+            break
+        width *= 2
+    dN, dZ = np.array(CHANNELS).T
+    Nin = np.repeat(N, len(CHANNELS))
+    Zin = np.repeat(Z, len(CHANNELS))
+    Nout = Nin + np.tile(dN, len(N))
+    Zout = Zin + np.tile(dZ, len(N))
+    valid = (Nout >= 0) & (Zout >= 1)
+    sel = rng.permutation(np.flatnonzero(valid))[:nflows]
+    return Nin[sel], Zin[sel], Nout[sel], Zout[sel]
+
+
+def writeFlowFile(path, nflows, time=1., dt=None, temp=1., dens=1e6, seed=0):
+    '''
+    write a WinNet flow file with nflows random flows
+    if dt is None the header has no dt column like older WinNet versions
+    '''
+    rng = np.random.default_rng(seed)
+    Nin, Zin, Nout, Zout = makeNetwork(nflows, seed=seed)
+    Ygrid = 10**rng.uniform(-19, -2, (Nout.max()+3, Zout.max()+3))
+    fl = 10**rng.uniform(-25, -3, len(Nin))
+    with open(path, 'w') as ff:
+        if dt is None:
+            ff.write('time temp dens\n')
+            ff.write('{:14.6e} {:14.6e} {:14.6e}\n'.format(time, temp, dens))
+        else:
+            ff.write('time dt temp dens\n')
+            ff.write('{:14.6e} {:14.6e} {:14.6e} {:14.6e}\n'.format(time, dt, temp, dens))
+        ff.write('nin zin yin nout zout yout flow\n')
+        np.savetxt(ff, np.rec.fromarrays([Nin, Zin, Ygrid[Nin, Zin], Nout, Zout, Ygrid[Nout, Zout], fl]),
+                   fmt='%4d %4d %14.6e %4d %4d %14.6e %14.6e')
+
+
+def writeSnapshot(path, nflows, time=1., temp=1., dens=1e6, seed=0):
+    '''
+    write a WinNet snapshot with the nuclei of the network of writeFlowFile
+    '''
+    rng = np.random.default_rng(seed)
+    Nin, Zin, Nout, Zout = makeNetwork(nflows, seed=seed)
+    Z, N = np.divmod(np.unique(np.concatenate((Zin*1000 + Nin, Zout*1000 + Nout))), 1000)
+    Y = 10**rng.uniform(-19, -2, len(N))
+    with open(path, 'w') as ff:
+        ff.write('time temp dens\n')
+        ff.write('{:14.6e} {:14.6e} {:14.6e}\n'.format(time, temp, dens))
+        ff.write('N Z Y X\n')
+        np.savetxt(ff, np.rec.fromarrays([N, Z, Y, Y*(N+Z)]), fmt='%4d %4d %14.6e %14.6e')
+
+
+def writeRun(path, nfiles=10, nflows=10000, snapshot_every=5, dt=True, seed=0):
+    '''
+    write a synthetic WinNet run to the directory path:
+    param.par with snapshot_every, flow/flow_XXXX.dat and snaps/snapsh_XXXX.dat
+    time grows logarithmically from 1e-3 to 1e3 and the temperature falls from 10 to .01 GK
+    if dt is False the flowfiles have no dt column like older WinNet versions
+    returns path
+    '''
+    for sub in ('flow', 'snaps'):
+        os.makedirs(os.path.join(path, sub), exist_ok=True)
+    with open(os.path.join(path, 'param.par'), 'w') as pf:
+        pf.write('snapshot_every = {}\n'.format(snapshot_every))
+    times = np.logspace(-3, 3, nfiles)
+    temps = np.logspace(1, -2, nfiles)
+    steps = np.diff(times, prepend=0)/snapshot_every
+    for ii, (time, step, temp) in enumerate(zip(times, steps, temps)):
+        dens = 1e6*temp**3
+        writeFlowFile(os.path.join(path, 'flow', 'flow_{:04d}.dat'.format(ii+1)), nflows, time=time,
+                      dt=step if dt else None, temp=temp, dens=dens, seed=seed+ii)
+        writeSnapshot(os.path.join(path, 'snaps', 'snapsh_{:04d}.dat'.format(ii+1)), nflows, time=time,
+                      temp=temp, dens=dens, seed=seed+ii)
+    return path
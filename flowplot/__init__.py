@@ -1,28 +1,83 @@
 import numpy as np
 import os
+from functools import lru_cache
+from ._tables import ELNAMES, STABLE_N, STABLE_Z
 
 datapath = os.path.dirname(__file__) + '/data'
-Elnames = np.loadtxt("{}/elementlist".format(datapath), dtype=str)
-St_N, St_Z = np.loadtxt('{}/stableiso.dat'.format(datapath), unpack=True, usecols=(1, 2))
+
+# element symbol -> proton number, ELNAMES[0] is 'neutron'
+_symbolZ = {el: Z for Z, el in enumerate(ELNAMES)}
+# names of light particles in WinNet -> (N, Z)
+_special = {'n': (1, 0), 'neutron': (1, 0), 'neutrons': (1, 0),
+            'p': (0, 1), 'd': (1, 1), 't': (2, 1)}
+
+
+@lru_cache(maxsize=None)
+def _name(N, Z):
+    if Z == 0 and N == 1:
+        return 'neutron'
+    return ELNAMES[Z] + str(Z + N)
+
+
+@lru_cache(maxsize=None)
+def _nz(name):
+    if name in _special:
+        return _special[name]
+    el = ''.join([let for let in name if let.isalpha()])
+    A = ''.join([let for let in name if let.isdigit()])
+    if el not in _symbolZ or not A:
+        raise ValueError("Unknown isotope {}".format(name))
+    Z = _symbolZ[el]
+    return int(A) - Z, Z
 
 
 def getName(N, Z):
     '''
     return name of isotpe from its neutron and proton numbers
+    the neutron is called 'neutron', p, d and t are h1, h2 and h3,
+    other isotopes with Z=0 are 'neutron' followed by their mass number as in the element table
     '''
-    N, Z = int(N), int(Z)
-    el = Elnames[Z]
-    A = Z + N
-    return el + str(A)
+    return _name(int(N), int(Z))
 
 
 def getNZ(name):
     '''
     return neutron and proton number for the name of an isotpe
+    also knows the WinNet names n, neutron, p, d and t
     '''
-    name = name.lower()
-    el = ''.join([let for let in name if let.isalpha()])
-    A = int(''.join([let for let in name if let.isdigit()]))
-    Z = int(np.argwhere(Elnames == el))
-    N = A - Z
-    return N, Z
+    return _nz(name.lower())
+
+
+def getNames(N, Z):
+    '''
+    returns array of names of the isotopes given by the arrays N and Z
+    '''
+    N, Z = np.asarray(N, dtype=int), np.asarray(Z, dtype=int)
+    keys, inverse = np.unique(Z*1000 + N, return_inverse=True)
+    names = np.array([_name(int(key % 1000), int(key // 1000)) for key in keys], dtype=str)
+    return names[inverse].reshape(N.shape)
+
+
+def getNZs(names):
+    '''
+    returns arrays of neutron and proton numbers for the array of names
+    '''
+    names = np.asarray(names, dtype=str)
+    unique, inverse = np.unique(names, return_inverse=True)
+    NZ = np.array([getNZ(name) for name in unique], dtype=int).reshape(-1, 2)
+    NZ = NZ[inverse.ravel()]
+    return NZ[:, 0].reshape(names.shape), NZ[:, 1].reshape(names.shape)
+
+
+# arrays of the tables are only built when they are used
+_arrays = {'Elnames': lambda: np.array(ELNAMES),
+           'St_N': lambda: np.array(STABLE_N, dtype=float),
+           'St_Z': lambda: np.array(STABLE_Z, dtype=float)}
+
+
+def __getattr__(name):
+    if name in _arrays:
+        value = _arrays[name]()
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
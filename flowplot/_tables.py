@@ -0,0 +1,44 @@
+'''
+Element names and stable isotopes as Python literals, so they load with the bytecode
+generated from data/elementlist and data/stableiso.dat
+'''
+
+ELNAMES = (
+    'neutron', 'h', 'he', 'li', 'be', 'b', 'c', 'n', 'o', 'f', 'ne', 'na', 'mg', 'al', 'si', 'p',
+    's', 'cl', 'ar', 'k', 'ca', 'sc', 'ti', 'v', 'cr', 'mn', 'fe', 'co', 'ni', 'cu', 'zn', 'ga',
+    'ge', 'as', 'se', 'br', 'kr', 'rb', 'sr', 'y', 'zr', 'nb', 'mo', 'tc', 'ru', 'rh', 'pd', 'ag',
+    'cd', 'in', 'sn', 'sb', 'te', 'i', 'xe', 'cs', 'ba', 'la', 'ce', 'pr', 'nd', 'pm', 'sm', 'eu',
+    'gd', 'tb', 'dy', 'ho', 'er', 'tm', 'yb', 'lu', 'hf', 'ta', 'w', 're', 'os', 'ir', 'pt', 'au',
+    'hg', 'tl', 'pb', 'bi', 'po', 'at', 'rn', 'fr', 'ra', 'ac', 'th', 'pa', 'u', 'np', 'pu', 'am',
+    'cm', 'bk', 'cf', 'es', 'fm', 'md', 'no', 'lr', 'rf', 'db', 'sg', 'bh', 'hs', 'mt', 'ds', 'rg',
+    'ub', 'ut', 'uq', 'up', 'uh', 'us', 'uo',
+)
+
+STABLE_N = (
+    0, 1, 1, 2, 3, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 10, 10, 10, 11, 12, 12, 12, 13, 14, 14, 14, 15, 16,
+    16, 16, 17, 18, 20, 18, 20, 18, 20, 22, 20, 22, 20, 22, 23, 24, 26, 28, 24, 24, 25, 26, 27, 28,
+    27, 28, 26, 28, 29, 30, 30, 28, 30, 31, 32, 32, 30, 32, 33, 34, 36, 34, 36, 34, 36, 37, 38, 40,
+    38, 40, 38, 40, 41, 42, 44, 42, 40, 42, 43, 44, 46, 48, 44, 46, 42, 44, 46, 47, 48, 50, 48, 50,
+    46, 48, 49, 50, 50, 50, 51, 52, 54, 56, 52, 50, 52, 53, 54, 55, 56, 58, 52, 54, 55, 56, 57, 58,
+    60, 58, 56, 58, 59, 60, 62, 64, 60, 62, 58, 60, 62, 63, 64, 65, 66, 68, 64, 66, 62, 64, 65, 66,
+    67, 68, 69, 70, 72, 74, 70, 72, 68, 70, 72, 73, 74, 74, 70, 72, 74, 75, 76, 77, 78, 80, 82, 78,
+    74, 76, 78, 79, 80, 81, 82, 82, 78, 80, 82, 84, 82, 82, 83, 85, 86, 88, 90, 82, 87, 88, 90, 92,
+    88, 90, 90, 91, 92, 93, 94, 96, 94, 90, 92, 94, 95, 96, 97, 98, 98, 94, 96, 98, 99, 100, 102,
+    100, 98, 100, 101, 102, 103, 104, 106, 104, 102, 104, 105, 106, 107, 108, 108, 106, 108, 109,
+    110, 112, 110, 108, 111, 112, 113, 114, 116, 114, 116, 114, 116, 117, 118, 120, 118, 116, 118,
+    119, 120, 121, 122, 124, 122, 124, 124, 125, 126, 126,
+)
+
+STABLE_Z = (
+    1, 1, 2, 2, 3, 3, 4, 5, 5, 6, 6, 7, 7, 8, 8, 8, 9, 10, 10, 10, 11, 12, 12, 12, 13, 14, 14, 14,
+    15, 16, 16, 16, 16, 17, 17, 18, 18, 18, 19, 19, 20, 20, 20, 20, 20, 20, 21, 22, 22, 22, 22, 22,
+    23, 23, 24, 24, 24, 24, 25, 26, 26, 26, 26, 27, 28, 28, 28, 28, 28, 29, 29, 30, 30, 30, 30, 30,
+    31, 31, 32, 32, 32, 32, 32, 33, 34, 34, 34, 34, 34, 34, 35, 35, 36, 36, 36, 36, 36, 36, 37, 37,
+    38, 38, 38, 38, 39, 40, 40, 40, 40, 40, 41, 42, 42, 42, 42, 42, 42, 42, 44, 44, 44, 44, 44, 44,
+    44, 45, 46, 46, 46, 46, 46, 46, 47, 47, 48, 48, 48, 48, 48, 48, 48, 48, 49, 49, 50, 50, 50, 50,
+    50, 50, 50, 50, 50, 50, 51, 51, 52, 52, 52, 52, 52, 53, 54, 54, 54, 54, 54, 54, 54, 54, 54, 55,
+    56, 56, 56, 56, 56, 56, 56, 57, 58, 58, 58, 58, 59, 60, 60, 60, 60, 60, 60, 62, 62, 62, 62, 62,
+    63, 63, 64, 64, 64, 64, 64, 64, 65, 66, 66, 66, 66, 66, 66, 66, 67, 68, 68, 68, 68, 68, 68, 69,
+    70, 70, 70, 70, 70, 70, 70, 71, 72, 72, 72, 72, 72, 72, 73, 74, 74, 74, 74, 74, 75, 76, 76, 76,
+    76, 76, 76, 77, 77, 78, 78, 78, 78, 78, 79, 80, 80, 80, 80, 80, 80, 80, 81, 81, 82, 82, 82, 83,
+)
@@ -0,0 +1,127 @@
+'''
+Console command flowplot: renders a figure for every flowfile and snapshot of a run
+
+usage: flowplot [-h] [-o OUTDIR] [-k {flow,snapsh,all}] [-f FORMAT] ...  directory [directory ...]
+'''
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from .flow.dirindex import PATTERN
+from .plots import ScanDir, plotFlowFile, plotSnapshot
+
+
+def _runDirs(path):
+    '''
+    returns the directories with WinNet output in path,
+    path itself or its subdirectories flow and snaps
+    '''
+    if any(PATTERN.match(file) for file in os.listdir(path)):
+        return [path]
+    return [os.path.join(path, sub) for sub in ('flow', 'snaps') if os.path.isdir(os.path.join(path, sub))]
+
+
+def findJobs(paths, outdir=None, kind='all', fmt='png', force=False):
+    '''
+    returns list of (input, output) for all files in the directories paths
+    whose figure is missing or older than the file
+    outputs go to outdir or to <directory>_plots next to each directory
+    '''
+    jobs = []
+    for path in paths:
+        for base in _runDirs(path):
+            out = outdir if outdir is not None else os.path.normpath(base) + '_plots'
+            for file in ScanDir(base)[0][::-1]:
+                match = PATTERN.match(os.path.basename(file))
+                if kind != 'all' and match.group(1) != kind:
+                    continue
+                target = os.path.join(out, os.path.basename(file)[:-4] + '.' + fmt)
+                if (not force and os.path.isfile(target)
+                        and os.stat(target).st_mtime_ns >= os.stat(file).st_mtime_ns):
+                    continue
+                jobs.append((file, target))
+    return jobs
+
+
+def render(path, target, figsize=(14, 14), dpi=100):
+    '''
+    renders flowfile or snapshot at path like plotFlowFile or plotSnapshot and saves it as target,
+    the figure is written to a temporary file first so an interrupted run leaves no broken figures
+    '''
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    fig, ax = plt.subplots(1, figsize=figsize)
+    try:
+        if os.path.basename(path).startswith('flow'):
+            plotFlowFile(ax, path)
+        else:
+            plotSnapshot(ax, path)
+        tmp = '{}.{}.tmp'.format(target, os.getpid())
+        fig.savefig(tmp, dpi=dpi, format=os.path.splitext(target)[1][1:])
+        os.replace(tmp, target)
+    finally:
+        plt.close(fig)
+
+
+def _render(path, target, figsize, dpi):
+    '''
+    render in a worker process, returns the error message or None
+    '''
+    try:
+        render(path, target, figsize=figsize, dpi=dpi)
+    except Exception as err:
+        return "{}: {}".format(type(err).__name__, err)
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='flowplot',
+                                     description='Render a figure for every flowfile and snapshot of WinNet runs. '
+                                     'Figures that are newer than their file are skipped, '
+                                     'so an interrupted call can just be repeated.')
+    parser.add_argument('directory', nargs='+',
+                        help='directory with flowfiles or snapshots, or a run directory with flow/ and snaps/')
+    parser.add_argument('-o', '--outdir', help='directory for the figures, default <directory>_plots')
+    parser.add_argument('-k', '--kind', choices=('flow', 'snapsh', 'all'), default='all',
+                        help='render only flowfiles or snapshots')
+    parser.add_argument('-f', '--format', default='png', help='file format of the figures (png, pdf, ...)')
+    parser.add_argument('--dpi', type=float, default=100)
+    parser.add_argument('--figsize', type=float, nargs=2, default=(14, 14))
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of processes, default number of cpus')
+    parser.add_argument('--force', action='store_true', help='render figures that are up to date')
+    parser.add_argument('-q', '--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    jobs = findJobs(args.directory, args.outdir, args.kind, args.format, args.force)
+    if not args.quiet:
+        print("{} figures to render".format(len(jobs)))
+    workers = args.workers or os.cpu_count() or 1
+    failed = []
+    if workers == 1:
+        results = ((job, _render(*job, args.figsize, args.dpi)) for job in jobs)
+    else:
+        pool = ProcessPoolExecutor(workers)
+        futures = {pool.submit(_render, *job, args.figsize, args.dpi): job for job in jobs}
+        results = ((futures[future], future.result()) for future in as_completed(futures))
+    try:
+        for done, ((path, _), error) in enumerate(results):
+            if error is not None:
+                failed.append(path)
+                print("{}: {}".format(path, error), file=sys.stderr)
+            if not args.quiet:
+                print("Progress: {:4.1f}%".format((done+1)/len(jobs)*100), end='\r')
+    finally:
+        if workers != 1:
+            pool.shutdown(cancel_futures=True)
+    if not args.quiet:
+        print("Done: {} figures, {} failed".format(len(jobs)-len(failed), len(failed)))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
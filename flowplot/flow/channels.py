@@ -0,0 +1,49 @@
+'''
+Classification of flows into reaction channels by their change (dN, dZ)
+Only the change of N and Z is known, so reactions with the same change share a channel,
+e.g. beta- decay and (p,n) are both 'beta-'.
+- CHANNELS       - dict of channel name: (dN, dZ)
+- CHANNEL_NAMES  - names of the channels in order of their index, followed by 'fission' and 'other'
+- classify
+'''
+from .. import np
+
+CHANNELS = {
+    'n,g': (1, 0),
+    'g,n': (-1, 0),       # also (n,2n)
+    'beta-': (-1, 1),     # also (p,n)
+    'beta+': (1, -1),     # also electron capture and (n,p)
+    'p,g': (0, 1),
+    'g,p': (0, -1),
+    'a,g': (2, 2),
+    'alpha': (-2, -2),    # alpha decay and (g,a)
+    'beta-,n': (-2, 1),
+    'beta-,2n': (-3, 1),
+    'a,n': (1, 2),
+    'a,p': (2, 1),
+    'n,a': (-1, -2),
+    'p,a': (-2, -1),
+}
+CHANNEL_NAMES = list(CHANNELS) + ['fission', 'other']
+FISSION = len(CHANNELS)
+OTHER = len(CHANNELS) + 1
+# flows losing more mass numbers than this are counted as fission
+FISSION_DA = 20
+
+# channel index of every (dN, dZ) with |dN|, |dZ| <= _REACH
+_REACH = 3
+_TABLE = np.full((2*_REACH+1, 2*_REACH+1), OTHER)
+for _ind, (_dN, _dZ) in enumerate(CHANNELS.values()):
+    _TABLE[_dN+_REACH, _dZ+_REACH] = _ind
+
+
+def classify(dN, dZ):
+    '''
+    returns the channel index (see CHANNEL_NAMES) of every flow with change dN, dZ
+    '''
+    dN = np.asarray(dN, dtype=int)
+    dZ = np.asarray(dZ, dtype=int)
+    near = (np.abs(dN) <= _REACH) & (np.abs(dZ) <= _REACH)
+    channel = np.where(dN + dZ < -FISSION_DA, FISSION, OTHER)
+    channel[near] = _TABLE[dN[near]+_REACH, dZ[near]+_REACH]
+    return channel
@@ -0,0 +1,137 @@
+import os
+import re
+from .. import np
+from .reader import readHeader
+
+# WinNet names flowfiles flow_XXXX.dat and snapshots snapsh_XXXX.dat
+PATTERN = re.compile(r'^(flow|snapsh)_(\d+)\.dat$')
+INDEX_NAME = '.flowplot_index.npz'
+
+# indices already built in this process, keyed by directory
+_indices = {}
+
+
+def _outEvery(base):
+    '''
+    returns snapshot_every from the .par file in directory base, 1 if not found
+    '''
+    for file in sorted(os.listdir(base)):
+        if file.endswith('.par'):
+            with open(os.path.join(base, file)) as pf:
+                for line in pf:
+                    if 'snapshot_every' in line:
+                        return int(line.split('=')[-1].strip())
+            break
+    return 1
+
+
+def _scanFiles(path):
+    '''
+    returns (kind, num, name, mtime) of the files in directory path matching PATTERN,
+    sorted by kind and num
+    '''
+    files = []
+    for entry in os.scandir(path):
+        match = PATTERN.match(entry.name)
+        if match is not None:
+            files.append((match.group(1), int(match.group(2)), entry.name, entry.stat().st_mtime_ns))
+    return sorted(files)
+
+
+class DirIndex(object):
+    '''
+    Table of the headers of all flowfiles and snapshots in a directory.
+    Only files matching the WinNet names (flow_XXXX.dat, snapsh_XXXX.dat) are read,
+    and only their headers, using workers threads.
+    The table is kept in <path>/.flowplot_index.npz together with the names and
+    modification times of the files, it is rebuilt when a file was added, removed or changed.
+    Input:
+       path       - directory
+       workers    - (optional) number of threads reading headers
+    Attributes:
+    - paths, kind, num, time, dt, temp, dens  - arrays with one entry per file, sorted by kind and num
+                                                kind is 'flow' or 'snapsh', dt is nan if not in header
+    - out_every                               - snapshot_every from the .par file in the parent directory
+    Methods:
+    - select
+    - find
+    '''
+
+    columns = ('paths', 'kind', 'num', 'time', 'dt', 'temp', 'dens')
+
+    def __init__(self, path, workers=None):
+        self.path = os.path.abspath(path)
+        # indices in this process are reused while the directory is unchanged
+        mtime = os.stat(self.path).st_mtime_ns
+        if _indices.get(self.path, (None,))[0] == mtime:
+            self.__dict__.update(_indices[self.path][1])
+            return
+        files = _scanFiles(self.path)
+        names = np.array([name for _, _, name, _ in files], dtype=str)
+        stamps = np.array([stamp for _, _, _, stamp in files], dtype=np.int64)
+        if not self._load(names, stamps):
+            self._build(files, names, stamps, workers)
+        _indices[self.path] = (mtime, dict(self.__dict__))
+
+    def _load(self, names, stamps):
+        '''
+        load the index file if it was written for the same files
+        returns True on success
+        '''
+        try:
+            with np.load(os.path.join(self.path, INDEX_NAME)) as index:
+                if not (np.array_equal(index['names'], names) and np.array_equal(index['stamps'], stamps)):
+                    return False
+                for name in self.columns + ('out_every',):
+                    setattr(self, name, index[name])
+        except Exception:
+            # missing, outdated or unreadable index, it is rebuilt
+            return False
+        self.out_every = int(self.out_every)
+        return True
+
+    def _build(self, files, names, stamps, workers):
+        '''
+        read the headers of all files and write the index file
+        '''
+        # only imported when the index is built, it slows down the import of the package
+        from concurrent.futures import ThreadPoolExecutor
+        self.kind = np.array([kind for kind, _, _, _ in files], dtype=str)
+        self.num = np.array([num for _, num, _, _ in files], dtype=int)
+        self.paths = np.array([os.path.join(self.path, name) for name in names], dtype=str)
+        with ThreadPoolExecutor(workers) as pool:
+            headers = np.array(list(pool.map(readHeader, self.paths)), dtype=float).reshape(-1, 4)
+        self.time, self.dt, self.temp, self.dens = headers.T
+        self.out_every = _outEvery(os.path.dirname(self.path))
+
+        # the index is only ever replaced as a whole, readers never see a partial file
+        tmp = os.path.join(self.path, '{}.{}.tmp'.format(INDEX_NAME, os.getpid()))
+        try:
+            with open(tmp, 'wb') as ff:
+                np.savez(ff, out_every=self.out_every, names=names, stamps=stamps,
+                         **{name: getattr(self, name) for name in self.columns})
+            os.replace(tmp, os.path.join(self.path, INDEX_NAME))
+        except OSError:
+            if os.path.isfile(tmp):
+                os.remove(tmp)
+
+    def select(self, kind):
+        '''
+        returns a DirIndex with only the files of kind 'flow' or 'snapsh'
+        '''
+        new = DirIndex.__new__(DirIndex)
+        new.__dict__.update(self.__dict__)
+        mask = self.kind == kind
+        for name in self.columns:
+            setattr(new, name, getattr(self, name)[mask])
+        return new
+
+    def find(self, kind, num):
+        '''
+        returns the position of file kind_num in the index, -1 if it is not there
+        '''
+        ind = np.flatnonzero((self.kind == kind) & (self.num == num))
+        return int(ind[0]) if len(ind) else -1
+
+    def __repr__(self):
+        return "DirIndex of {}: {} files".format(self.path, len(self.paths))
@@ -1,135 +1,474 @@
+import os
 from .. import np, getName
-from .flux import Flow
-from .isotopecollection import IsotopeCollection
+from .flux import FlowArray
+from .isotopecollection import IsotopeCollection, _reserve, _key
+from .reader import loadNpz
+from .channels import CHANNEL_NAMES, classify
+from ..profiling import instrument
+
+
+def _netFlows(iso_in, iso_out, flow, niso, gross=False):
+    '''
+    sums up flows between the same isotopes and cancels flows with their reverse flows
+    iso_in and iso_out are isotope indices smaller than niso
+    returns iso_in, iso_out and flow of the net flows,
+    with gross also the summed flows in direction of the net flow and against it
+    '''
+    # key every flow by its pair of isotopes, the sign gives the direction
+    low = np.minimum(iso_in, iso_out)
+    high = np.maximum(iso_in, iso_out)
+    signed = np.where(iso_in == low, flow, -flow)
+    keys, inverse = np.unique(low*niso + high, return_inverse=True)
+    net = np.bincount(inverse, weights=signed, minlength=len(keys))
+
+    low, high = np.divmod(keys, niso)
+    forward = net > 0
+    keep = net != 0
+    nets = (np.where(forward, low, high)[keep],
+            np.where(forward, high, low)[keep],
+            np.abs(net)[keep])
+    if not gross:
+        return nets
+    up = np.bincount(inverse, weights=np.where(signed > 0, signed, 0), minlength=len(keys))
+    down = up - net
+    return nets + (np.where(forward, up, down)[keep], np.where(forward, down, up)[keep])
+
+
+def _mergeProvenance(prov1, prov2):
+    '''
+    returns the provenance of the sum of two collections,
+    options that differ between them are None
+    '''
+    if not prov1 or not prov2:
+        return {}
+    merged = dict(paths=list(prov1['paths']) + list(prov2['paths']),
+                  tmin=min(prov1['tmin'], prov2['tmin']),
+                  tmax=max(prov1['tmax'], prov2['tmax']))
+    for key in ('ymin', 'flmin'):
+        merged[key] = prov1[key] if prov1[key] == prov2[key] else None
+    return merged
 
 
 class FlowCollection(IsotopeCollection):
     '''
     contains isotopes and their flows
+    Flows are stored as arrays of isotope indices and flow values,
+    Flow objects are only created when the flows are accessed
     Attributes:
     - isotopes
     - flows
+    - iso_in, iso_out  - arrays of isotope indices of target and product
+    - flow             - array of flow values
+    - N0, Z0, dN, dZ   - arrays of start point and direction of flows
+    - forward, backward - gross flows in direction of every flow and against it,
+                         only kept by net(gross=True), None otherwise
+    - provenance       - dict with the flowfiles the flows come from:
+                         paths, tmin and tmax (time range), ymin and flmin (options of FlowFile),
+                         empty if unknown
     Methods:
     - sort
+    - net
     - getMaxFlow
     - getMinFlow
     - getFlowsTo
+    - getFlowsFrom
+    - getIsotopeFlows
+    - getAdjacency
+    - getBranchings
+    - getChannels
+    - getChannelTotals
+    - getElementFlows
+    - getMassFlows
+    - getDominantChannels
+    - save
+    - load
+    - writeFlowFile
     Addition creates a new FlowCollection instance
        - flows are added together
        - keeps isotope with higher abundance
     '''
 
     def __init__(self,  ymin=1e-10):
-        super(FlowCollection, self).__init__()
-        self.flows = np.array([])
+        super(FlowCollection, self).__init__(ymin=ymin)
+        self._nflow = 0
+        self._iso_in = np.empty(0, dtype=int)
+        self._iso_out = np.empty(0, dtype=int)
+        self._flow = np.empty(0, dtype=float)
+        self._flows = None
+        self._graph = {}
+        self._gross = None
+        self.provenance = {}
+
+    @property
+    def iso_in(self):
+        '''indices of target isotopes'''
+        return self._iso_in[:self._nflow]
+
+    @property
+    def iso_out(self):
+        '''indices of product isotopes'''
+        return self._iso_out[:self._nflow]
+
+    @property
+    def flow(self):
+        '''flow values'''
+        return self._flow[:self._nflow]
+
+    @property
+    def N0(self):
+        '''neutron numbers of target isotopes'''
+        return self.N[self.iso_in]
+
+    @property
+    def Z0(self):
+        '''proton numbers of target isotopes'''
+        return self.Z[self.iso_in]
+
+    @property
+    def dN(self):
+        '''change in neutron number'''
+        return self.N[self.iso_out] - self.N[self.iso_in]
+
+    @property
+    def dZ(self):
+        '''change in proton number'''
+        return self.Z[self.iso_out] - self.Z[self.iso_in]
+
+    @property
+    def forward(self):
+        '''gross flows in direction of the flows, see net'''
+        return None if self._gross is None else self._gross[0]
+
+    @property
+    def backward(self):
+        '''gross flows against the direction of the flows, see net'''
+        return None if self._gross is None else self._gross[1]
+
+    @property
+    def flows(self):
+        '''
+        sequence of the flows as Flow records, see FlowArray
+        '''
+        if self._flows is None:
+            self._flows = FlowArray(self.isotopes, self.iso_in, self.iso_out, self.flow)
+        return self._flows
+
+    def getIsotopeFlows(self, name=None, Z=None, N=None):
+        '''
+        returns the flows going into and coming out of
+        the isotope given by name or Z and N
+        '''
+        ind = self._isotopeIndex(name=name, Z=Z, N=N)
+        if ind < 0:
+            raise ValueError("{} not in {}".format(name or getName(N, Z), self))
+        return self.flows[self.iso_out == ind], self.flows[self.iso_in == ind]
+
+    def _invalidate(self):
+        super(FlowCollection, self)._invalidate()
+        self._flows = None
+        self._graph = {}
+
+    def _setFlows(self, iso_in, iso_out, flow):
+        '''
+        replace all flows by the ones given in the arrays iso_in, iso_out and flow
+        '''
+        self._iso_in = np.array(iso_in, dtype=int)
+        self._iso_out = np.array(iso_out, dtype=int)
+        self._flow = np.array(flow, dtype=float)
+        self._nflow = len(self._flow)
+        self._flows = None
+        self._graph = {}
+        self._gross = None
+
+    def _appendFlow(self, i_in, i_out, flow):
+        '''
+        append a flow to the arrays and return its index
+        '''
+        ind = self._nflow
+        self._iso_in = _reserve(self._iso_in, ind+1)
+        self._iso_out = _reserve(self._iso_out, ind+1)
+        self._flow = _reserve(self._flow, ind+1)
+        self._iso_in[ind], self._iso_out[ind], self._flow[ind] = i_in, i_out, flow
+        self._nflow += 1
+        self._flows = None
+        self._graph = {}
+        self._gross = None
+        return ind
 
     def addFlowFromName(self, name, flow):
         '''
         assumes Isotopes are in self.isotopes
+        returns the index of the new flow
         '''
         name_in, name_out = name.split('->')
-        iso_in = self.getIsotope(name=name_in)
-        iso_out = self.getIsotope(name=name_out)
-        flow = Flow(iso_in, iso_out, flow)
-        self.flows = np.append(self.flows, flow)
-        iso_in.flow_out = np.append(iso_in.flow_out, flow)
-        iso_out.flow_in = np.append(iso_out.flow_in, flow)
-        return flow
+        i_in = self._isotopeIndex(name=name_in)
+        i_out = self._isotopeIndex(name=name_out)
+        if i_in < 0 or i_out < 0:
+            raise ValueError("{} not in {}".format(name, self))
+        return self._appendFlow(i_in, i_out, flow)
 
+    @instrument(rows=lambda result, args: 1)
     def addFlowFromZN(self, Nin,  Zin, Yin, Nout, Zout, Yout, flow):
         '''
         add Flow from Zin, Zout, Nin and Nout
         checks for isotope in isotopes and adds it if it is not present
+        returns the index of the new flow
         '''
         if flow < 1e-99:
             return
-        name_in = getName(Nin, Zin)
-        name_out = getName(Nout, Zout)
-
-        if name_in in self.isotopes.astype(str):
-            iso_in = self.getIsotope(name=name_in)
-        else:
-            iso_in = self.addIsotope(name=name_in, Y=Yin)
-
-        if name_out in self.isotopes.astype(str):
-            iso_out = self.getIsotope(name=name_out)
-        else:
-            iso_out = self.addIsotope(name=name_out, Y=Yin)
-
-        flow = Flow(iso_in, iso_out, flow)
-        self.flows = np.append(self.flows, flow)
-        iso_in.flow_out = np.append(iso_in.flow_out, flow)
-        iso_out.flow_in = np.append(iso_out.flow_in, flow)
-        return flow
-
-    def addIsotope(self, **kwargs):
-        '''
-        Add a isotope object from either of:
-        - name
-        - Z and N
-        Optional:
-        - Y
-        '''
-        iso = super(FlowCollection, self).addIsotope(**kwargs)
-        iso.flow_in = np.array([])
-        iso.flow_out = np.array([])
-        return iso
+        i_in = self._isotopeIndex(Z=Zin, N=Nin)
+        if i_in < 0:
+            i_in = self._appendIsotope(Nin, Zin, Yin)
+
+        i_out = self._isotopeIndex(Z=Zout, N=Nout)
+        if i_out < 0:
+            i_out = self._appendIsotope(Nout, Zout, Yout)
+
+        return self._appendFlow(i_in, i_out, flow)
+
+    @instrument(rows=lambda result, args: len(args['Nin']))
+    def addFlowsFromZN(self, Nin, Zin, Yin, Nout, Zout, Yout, flow):
+        '''
+        add many flows at once, takes arrays instead of the numbers of addFlowFromZN
+        isotopes that are not present are added with the highest abundance given for them
+        returns the indices of the new flows
+        '''
+        flow = np.asarray(flow, dtype=float)
+        mask = flow >= 1e-99
+        nflow = np.count_nonzero(mask)
+        keys = np.concatenate((_key(np.asarray(Nin, dtype=int)[mask], np.asarray(Zin, dtype=int)[mask]),
+                               _key(np.asarray(Nout, dtype=int)[mask], np.asarray(Zout, dtype=int)[mask])))
+        Ys = np.concatenate((np.asarray(Yin, dtype=float)[mask], np.asarray(Yout, dtype=float)[mask]))
+
+        # one entry per isotope with the highest abundance
+        keys, inverse = np.unique(keys, return_inverse=True)
+        Y = np.full(len(keys), np.nan)
+        np.fmax.at(Y, inverse, Ys)
+        Z, N = np.divmod(keys, 1000)
+
+        # add isotopes that are not present yet
+        inds = self.getIndices(N, Z)
+        new = inds < 0
+        inds[new] = self._niso + np.arange(np.count_nonzero(new))
+        if np.any(new):
+            self._setIsotopes(np.concatenate((self.N, N[new])),
+                              np.concatenate((self.Z, Z[new])),
+                              np.concatenate((self.Y, Y[new])))
 
+        inds = inds[inverse]
+        first = self._nflow
+        self._setFlows(np.concatenate((self.iso_in, inds[:nflow])),
+                       np.concatenate((self.iso_out, inds[nflow:])),
+                       np.concatenate((self.flow, flow[mask])))
+        return np.arange(first, self._nflow)
+
+    def setIsotopes(self, other):
+        '''
+        replace all isotopes by the ones of the IsotopeCollection other, with their abundances
+        the flows are kept, raises ValueError if one of their isotopes is not in other
+        '''
+        inds = other.getIndices(self.N, self.Z)
+        used = np.zeros(self._niso, dtype=bool)
+        used[self.iso_in] = used[self.iso_out] = True
+        if np.any(inds[used] < 0):
+            missing = np.flatnonzero(used & (inds < 0))[0]
+            raise ValueError("Isotope {} of a flow is not in {}".format(
+                getName(self.N[missing], self.Z[missing]), other))
+        gross = self._gross
+        super(FlowCollection, self).setIsotopes(other)
+        self._setFlows(inds[self.iso_in], inds[self.iso_out], self.flow)
+        self._gross = gross
+
+    def _reorderIsotopes(self, order):
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        super(FlowCollection, self)._reorderIsotopes(order)
+        gross = self._gross
+        self._setFlows(inverse[self.iso_in], inverse[self.iso_out], self.flow)
+        self._gross = gross
+
+    @instrument(rows=lambda result, args: args['self']._nflow)
     def sort(self):
         '''
         sort flows by flow
         sort isotopes by abundance
         '''
         super(FlowCollection, self).sort()
-        flows = np.vectorize(lambda f: f.flow)(self.flows)
-        self.flows = self.flows[np.argsort(flows)]
+        order = np.argsort(self.flow, kind='stable')
+        gross = self._gross
+        self._setFlows(self.iso_in[order], self.iso_out[order], self.flow[order])
+        if gross is not None:
+            self._gross = gross[0][order], gross[1][order]
+
+    def net(self, gross=False):
+        '''
+        returns a new FlowCollection with the net flows:
+        flows between the same isotopes are summed up and reverse flows subtracted
+        gross - keep the summed flows in direction of every net flow and against it
+                as forward and backward
+        '''
+        new = FlowCollection(ymin=self.ymin)
+        new._setIsotopes(self.N, self.Z, self.Y)
+        new._setNetFlows(*self._grossFlows(), gross=gross)
+        new.provenance = dict(self.provenance)
+        return new
+
+    def _setNetFlows(self, iso_in, iso_out, flow, gross=False):
+        '''
+        replace all flows by the net flows of iso_in, iso_out and flow and sort
+        '''
+        nets = _netFlows(iso_in, iso_out, flow, self._niso, gross)
+        self._setFlows(*nets[:3])
+        if gross:
+            self._gross = nets[3:]
+        self.sort()
+
+    def _grossFlows(self):
+        '''
+        returns iso_in, iso_out and flow with the forward and backward flows
+        as separate flows if they are kept
+        '''
+        if self._gross is None:
+            return self.iso_in, self.iso_out, self.flow
+        return (np.concatenate((self.iso_in, self.iso_out)), np.concatenate((self.iso_out, self.iso_in)),
+                np.concatenate(self._gross))
 
     def getMaxFlow(self):
         '''
         returns maximal flow in flowfile
         '''
-        return np.max(np.vectorize(lambda f: f.flow)(self.flows))
+        return np.max(self.flow)
 
     def getMinFlow(self):
         '''
         returns minimal flow in flowfile
         '''
-        return np.min(np.vectorize(lambda f: f.flow)(self.flows))
+        return np.min(self.flow)
+
+    def getChannels(self):
+        '''
+        returns the reaction channel of every flow as index into CHANNEL_NAMES,
+        see flowplot.flow.channels
+        '''
+        return classify(self.dN, self.dZ)
+
+    def getChannelTotals(self):
+        '''
+        returns dict of channel name: sum of the flows in this channel
+        reverse flows are already subtracted in summed collections,
+        so e.g. (n,g) and (g,n) only get the net flow
+        '''
+        totals = np.bincount(self.getChannels(), weights=self.flow, minlength=len(CHANNEL_NAMES))
+        return dict(zip(CHANNEL_NAMES, totals))
+
+    def getElementFlows(self):
+        '''
+        returns the net flow into every element as array indexed by Z
+        '''
+        size = int(self.Z.max()) + 1 if self._niso else 0
+        return (np.bincount(self.Z[self.iso_out], weights=self.flow, minlength=size)
+                - np.bincount(self.Z[self.iso_in], weights=self.flow, minlength=size))
+
+    def getMassFlows(self):
+        '''
+        returns the net flow into every mass number as array indexed by A
+        '''
+        A = self.N + self.Z
+        size = int(A.max()) + 1 if self._niso else 0
+        return (np.bincount(A[self.iso_out], weights=self.flow, minlength=size)
+                - np.bincount(A[self.iso_in], weights=self.flow, minlength=size))
+
+    def getDominantChannels(self):
+        '''
+        returns the channel with the largest flow out of every isotope
+        as index into CHANNEL_NAMES, in the order of isotopes, -1 if nothing flows out of it
+        '''
+        nchannel = len(CHANNEL_NAMES)
+        totals = np.bincount(self.iso_in*nchannel + self.getChannels(), weights=self.flow,
+                             minlength=self._niso*nchannel).reshape(self._niso, nchannel)
+        return np.where(totals.max(axis=1, initial=0) > 0, totals.argmax(axis=1), -1)
+
+    def _subCollection(self, indices, flow):
+        '''
+        returns a new flowcollection with all isotopes but only the flows
+        with the given indices and flow values
+        '''
+        subcol = FlowCollection(ymin=self.ymin)
+        subcol._setIsotopes(self.N, self.Z, self.Y)
+        subcol._setFlows(self.iso_in[indices], self.iso_out[indices], flow)
+        subcol.provenance = dict(self.provenance)
+        return subcol
+
+    def getAdjacency(self):
+        '''
+        returns the flow network as scipy.sparse CSR matrix A,
+        A[i, j] is the flow from isotope i to isotope j
+        '''
+        # scipy is only needed for the graph methods
+        from scipy import sparse
+        return sparse.csr_matrix((self.flow, (self.iso_in, self.iso_out)),
+                                 shape=(self._niso, self._niso))
+
+    def _totalFlows(self, backwards=False):
+        '''
+        returns the total flow out of every isotope, into every isotope if backwards
+        '''
+        group = self.iso_out if backwards else self.iso_in
+        return np.bincount(group, weights=self.flow, minlength=self._niso)
+
+    def getBranchings(self, backwards=False):
+        '''
+        returns the branching fractions as scipy.sparse CSR matrix B,
+        B[i, j] is the fraction of the flow out of isotope i that goes to isotope j.
+        If backwards B[i, j] is the fraction of the flow into isotope i that comes from isotope j
+        '''
+        from scipy import sparse
+        adjacency = self.getAdjacency()
+        if backwards:
+            adjacency = adjacency.T.tocsr()
+        total = self._totalFlows(backwards)
+        scale = np.divide(1, total, out=np.zeros_like(total), where=total > 0)
+        return sparse.diags(scale).dot(adjacency).tocsr()
+
+    def _traceFlows(self, name, N, backwards):
+        '''
+        follow the flows connected to the isotope with name <name> by N steps
+        backwards: follow flows into the isotope instead of out of it
+        Every flow gets the part of the flow through the start isotope that passes it,
+        summed over all paths of up to N steps.
+        returns indices and scaled values of the flows
+        '''
+        start = self._isotopeIndex(name=name)
+        if start < 0:
+            raise ValueError("{} not in {}".format(name, self))
+        if backwards not in self._graph:
+            self._graph[backwards] = (self.getBranchings(backwards).T.tocsr(),
+                                      self._totalFlows(backwards))
+        branchings, total = self._graph[backwards]
+
+        # weight[i] is the flow through isotope i after the current number of steps,
+        # passed is the sum of weight over all steps
+        weight = np.zeros(self._niso)
+        weight[start] = total[start]
+        passed = np.zeros(self._niso)
+        for _ in range(N):
+            passed += weight
+            weight = branchings.dot(weight)
+
+        source = self.iso_out if backwards else self.iso_in
+        scale = np.divide(passed, total, out=np.zeros_like(total), where=total > 0)
+        values = self.flow * scale[source]
+        indices = np.flatnonzero(values > 0)
+        return indices, values[indices]
 
     def getFlowsTo(self, name, N):
         '''
         Returns a new flowcollection with all isotopes but only the flows
         that are connected to the isotope with name <name> by N steps.
-        Flows are scaled to match their parent flow
-        '''
-        def prevFlows(flow):
-            new_flows = []
-            frac = flow.flow / sum(map(lambda f: f.flow, flow.iso_in.flow_in))
-            for fl in flow.iso_in.flow_in:
-                new_flows.append(Flow(fl.iso_in, fl.iso_out, fl.flow*frac))
-            return np.array(new_flows)
-
-        iso = self.getIsotope(name=name)
-        subcol = FlowCollection()
-        subcol.isotopes = self.isotopes
-        for fl in iso.flow_in:
-            subcol.addFlowFromZN(Nin=fl.iso_in.N, Zin=fl.iso_in.Z, Yin=fl.iso_in.Y,
-                                 Nout=fl.iso_out.N, Zout=fl.iso_out.Z, Yout=fl.iso_out.Y,
-                                 flow=fl.flow)
-        oldFlows = subcol.flows
-        for _ in range(N-1):
-            newFlows = []
-            for fl in np.concatenate([prevFlows(fl) for fl in oldFlows]):
-                flname = str(fl)
-                newFlows.append(fl)
-                if flname in subcol.flows.astype(str):
-                    # subcol.flows[subcol.flows.astype(str) == flname][0].flow += fl.flow
-                    pass
-                else:
-                    subcol.addFlowFromZN(Nin=fl.iso_in.N, Zin=fl.iso_in.Z, Yin=fl.iso_in.Y,
-                                         Nout=fl.iso_out.N, Zout=fl.iso_out.Z, Yout=fl.iso_out.Y,
-                                         flow=fl.flow)
-            oldFlows = newFlows
+        Flows are scaled to match their parent flow,
+        flows reached on several paths get the sum of all paths
+        '''
+        subcol = self._subCollection(*self._traceFlows(name, N, backwards=True))
         subcol.sort()
         return subcol
 
@@ -137,92 +476,91 @@ class FlowCollection(IsotopeCollection):
         '''
         Returns a new flowcollection with all isotopes but only the flows
         that are connected to the isotope with name <name> by N steps.
-        Flows are scaled to match their parent flow
-        '''
-        def followingFlows(flow):
-            new_flows = []
-            frac = flow.flow / sum(map(lambda f: f.flow, flow.iso_out.flow_out))
-            for fl in flow.iso_out.flow_out:
-                new_flows.append(Flow(fl.iso_in, fl.iso_out, fl.flow*frac))
-            return np.array(new_flows)
-
-        iso = self.getIsotope(name=name)
-        subcol = FlowCollection()
-        subcol.isotopes = self.isotopes
-        for fl in iso.flow_out:
-            subcol.addFlowFromZN(Nin=fl.iso_in.N, Zin=fl.iso_in.Z, Yin=fl.iso_in.Y,
-                                 Nout=fl.iso_out.N, Zout=fl.iso_out.Z, Yout=fl.iso_out.Y,
-                                 flow=fl.flow)
-        oldFlows = subcol.flows
-        for _ in range(N-1):
-            newFlows = []
-            for fl in np.concatenate([followingFlows(fl) for fl in oldFlows]):
-                flname = str(fl)
-                newFlows.append(fl)
-                if flname in subcol.flows.astype(str):
-                    # subcol.flows[subcol.flows.astype(str) == flname][0].flow += fl.flow
-                    pass
-                else:
-                    subcol.addFlowFromZN(Nin=fl.iso_in.N, Zin=fl.iso_in.Z, Yin=fl.iso_in.Y,
-                                         Nout=fl.iso_out.N, Zout=fl.iso_out.Z, Yout=fl.iso_out.Y,
-                                         flow=fl.flow)
-            oldFlows = newFlows
+        Flows are scaled to match their parent flow,
+        flows reached on several paths get the sum of all paths
+        '''
+        subcol = self._subCollection(*self._traceFlows(name, N, backwards=False))
         subcol.sort()
         return subcol
 
+    @instrument(rows=lambda result, args: result._nflow)
     def __add__(self, other):
         new = FlowCollection(ymin=min(self.ymin, other.ymin))
 
-        # get arrays of abundaces and flows as well as isotope and flow names
-        isos1 = self.isotopes.astype(str)
-        isos2 = other.isotopes.astype(str)
-        abs1 = np.vectorize(lambda n: n.Y)(self.isotopes)
-        abs2 = np.vectorize(lambda n: n.Y)(other.isotopes)
-        flow_names1 = self.flows.astype(str)
-        flow_names2 = other.flows.astype(str)
-        flow_names1_reversed = np.vectorize(lambda f: '->'.join(f.split('->')[::-1]))(flow_names1)
-        flow_names2_reversed = np.vectorize(lambda f: '->'.join(f.split('->')[::-1]))(flow_names2)
-        flows1 = np.vectorize(lambda f: f.flow)(self.flows)
-        flows2 = np.vectorize(lambda f: f.flow)(other.flows)
-
-        # for isotopes in both sets add an isotope with max(Y1, Y2)
-        for name, i1, i2 in zip(*np.intersect1d(isos1, isos2, assume_unique=True, return_indices=True)):
-            new.addIsotope(name=name, Y=max(abs1[i1], abs2[i2]))
-        # add the rest
-        for name in np.setxor1d(isos1, isos2, assume_unique=True):
-            Y = np.concatenate((abs1[isos1 == name], abs2[isos2 == name]))[0]
-            new.addIsotope(name=name, Y=Y)
-
-        # for flows in both sets add a flow with the sum of flows
-        names, is1, is2 = np.intersect1d(flow_names1, flow_names2, assume_unique=True, return_indices=True)
-        for name, flow in zip(names, flows1[is1]+flows2[is2]):
-            new.addFlowFromName(name, flow)
-
-        # if other contais the reverse of a flow in self but the flow in self is bigger
-        # add the flow from self but substract the flow from other
-        names, is1, is2 = np.intersect1d(flow_names1, flow_names2_reversed, assume_unique=True, return_indices=True)
-        delflow = flows1[is1]-flows2[is2]
-        mask = delflow > 0
-        for name, flow in zip(names[mask], delflow[mask]):
-            new.addFlowFromName(name, flow)
-
-        # if other contais the reverse of a flow in self but the flow in other is bigger
-        # add the flow from other but substract the flow from self
-        mask = np.logical_not(mask)
-        names = flow_names2[is2]
-        for name, flow in zip(names[mask], -delflow[mask]):
-            new.addFlowFromName(name, flow)
-
-        # finaly for flows that are only self or other and not the reverse of anything just add the flow
-        names = np.setxor1d(flow_names1, flow_names2, assume_unique=True)
-        rev_names = np.concatenate([flow_names1_reversed, flow_names2_reversed])
-        for name in names:
-            if name not in rev_names:
-                flow = np.concatenate((flows1[flow_names1 == name], flows2[flow_names2 == name]))[0]
-                new.addFlowFromName(name, flow)
-
-        new.sort()
+        # add the union of isotopes, isotopes in both sets get max(Y1, Y2)
+        N, Z, Y, inds1, inds2 = self._mergeIsotopes(other)
+        new._setIsotopes(N, Z, Y)
+
+        # flows in both sets are added, reverse flows are substracted from each other
+        (in1, out1, flow1), (in2, out2, flow2) = self._grossFlows(), other._grossFlows()
+        new._setNetFlows(np.concatenate((inds1[in1], inds2[in2])), np.concatenate((inds1[out1], inds2[out2])),
+                         np.concatenate((flow1, flow2)),
+                         gross=self._gross is not None and other._gross is not None)
+        new.provenance = _mergeProvenance(self.provenance, other.provenance)
+        return new
+
+    def save(self, path, **extra):
+        '''
+        writes isotopes, flows and provenance to path as uncompressed .npz file,
+        read it with FlowCollection.load
+        extra arrays are stored in the same file, e.g. by IncrementalIntegrator
+        '''
+        arrays = dict(extra, N=self.N, Z=self.Z, Y=self.Y, ymin=self.ymin,
+                      iso_in=self.iso_in, iso_out=self.iso_out, flow=self.flow)
+        if self._gross is not None:
+            arrays.update(forward=self.forward, backward=self.backward)
+        if self.provenance:
+            prov = self.provenance
+            arrays.update(provenance_paths=np.array(prov['paths'], dtype=str),
+                          provenance_tmin=prov['tmin'], provenance_tmax=prov['tmax'],
+                          provenance_ymin=np.nan if prov['ymin'] is None else prov['ymin'],
+                          provenance_flmin=np.nan if prov['flmin'] is None else prov['flmin'])
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp, 'wb') as ff:
+            np.savez(ff, **arrays)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path, mmap=True):
+        '''
+        returns the FlowCollection written to path by save
+        mmap - the flow arrays are memory-mapped instead of read,
+               they are copied when the flows are changed
+        '''
+        arrays = loadNpz(path) if mmap else dict(np.load(path))
+        new = FlowCollection(ymin=float(arrays['ymin']))
+        new._setIsotopes(arrays['N'], arrays['Z'], arrays['Y'])
+        new._iso_in, new._iso_out, new._flow = arrays['iso_in'], arrays['iso_out'], arrays['flow']
+        new._nflow = len(new._flow)
+        if 'forward' in arrays:
+            new._gross = arrays['forward'], arrays['backward']
+        if 'provenance_paths' in arrays:
+            options = [float(arrays['provenance_' + key]) for key in ('ymin', 'flmin')]
+            new.provenance = dict(paths=arrays['provenance_paths'].tolist(),
+                                  tmin=float(arrays['provenance_tmin']),
+                                  tmax=float(arrays['provenance_tmax']),
+                                  ymin=None if np.isnan(options[0]) else options[0],
+                                  flmin=None if np.isnan(options[1]) else options[1])
         return new
 
+    def writeFlowFile(self, path, time=None, temp=0., dens=0.):
+        '''
+        writes the flows in the text format of WinNet flowfiles, readable by FlowFile
+        time defaults to the end of the time range in provenance,
+        dt is the length of the time range
+        '''
+        prov = self.provenance
+        if time is None:
+            time = prov.get('tmax', 0.)
+        dt = prov['tmax'] - prov['tmin'] if prov else 0.
+        N, Z, Y = self.N, self.Z, self.Y
+        table = np.column_stack((N[self.iso_in], Z[self.iso_in], Y[self.iso_in],
+                                 N[self.iso_out], Z[self.iso_out], Y[self.iso_out], self.flow))
+        with open(path, 'w') as ff:
+            ff.write('time dt temp dens\n')
+            ff.write('{:24.16e} {:24.16e} {:24.16e} {:24.16e}\n'.format(time, dt, temp, dens))
+            ff.write('nin zin yin nout zout yout flow\n')
+            np.savetxt(ff, table, fmt='%4d %4d %24.16e %4d %4d %24.16e %24.16e')
+
     def __repr__(self):
-        return "FlowCollection: {} flows".format(len(self.flows))
+        return "FlowCollection: {} flows".format(self._nflow)
@@ -1,6 +1,16 @@
 import os
 from .. import np
+from ..profiling import instrument
 from .flowcollection import FlowCollection
+from .reader import readFile
+from .dirindex import DirIndex, PATTERN
+
+
+def _inRange(values, limits):
+    '''
+    returns mask of values with limits[0] <= value <= limits[1]
+    '''
+    return (values >= limits[0]) & (values <= limits[1])
 
 
 class FlowFile(FlowCollection):
@@ -11,69 +21,70 @@ class FlowFile(FlowCollection):
        path        - path to FlowFile
        ymin        - (optional) minimum abundance to be considered
        flmin       - (optional) minimum flow to be considered (relative to bigest flow in file)
+       cache       - (optional) keep a binary copy of the file next to it for faster loading
+       top         - (optional) only keep the top flows with the largest values
+       bounds      - (optional) (Nmin, Nmax, Zmin, Zmax), only keep flows starting or ending in this box
+       Arange      - (optional) (Amin, Amax), only keep flows starting or ending in this range of mass numbers
+       channels    - (optional) list of (dN, dZ), only keep flows of these reaction types, e.g. [(1, 0), (-1, 1)]
+    The selections are applied to the columns of the file before any isotopes are created,
+    top is applied last
     Attributes:
     - isotopes     - array of isotope objects
     - flows        - array of absolute(!) flows (dY/dt)*dt
     - num          - number of flowfile
     '''
 
-    def __init__(self, path, ymin=1e-20, flmin=0):
+    @instrument(rows=lambda result, args: args['self']._nflow)
+    def __init__(self, path, ymin=1e-20, flmin=0, cache=False, top=None, bounds=None, Arange=None,
+                 channels=None):
         super(FlowFile, self).__init__()
 
         self.path = path
         self.num = int(path.split("_")[-1][:-4])
 
-        with open(path, 'r') as ff:
-            header = ff.readline()
-            if 'dt' in header:
-                header = ff.readline()
-                self.time, self.dt, self.temp, self.dens = np.array(header.split()).astype(float)
-            else:
-                header = ff.readline()
-                self.time, self.temp, self.dens = np.array(header.split()).astype(float)
-                self.dt = self.get_fake_dt()
+        (self.time, self.dt, self.temp, self.dens), table = readFile(path, cache=cache)
+        if np.isnan(self.dt):
+            self.dt = self.get_fake_dt()
 
-        nins, zins, yins, nouts, zouts, youts, fls = np.loadtxt(path, skiprows=3, unpack=True)
-        mfl = max(fls) * flmin
-        for nin, zin, yin, nout, zout, yout, fl in zip(nins, zins, yins, nouts, zouts, youts, fls):
-            if fl < mfl:
-                continue
-            if yin < ymin:
-                continue
-            if yout < ymin:
-                yout = -np.inf
-            self.addFlowFromZN(nin, zin, yin, nout, zout, yout, fl)
+        nins, zins, yins, nouts, zouts, youts, fls = table.T
+        mask = (yins >= ymin)
+        if len(fls) > 0:
+            mask &= (fls >= fls.max() * flmin)
+        if bounds is not None:
+            mask &= (_inRange(nins, bounds[:2]) & _inRange(zins, bounds[2:])
+                     | _inRange(nouts, bounds[:2]) & _inRange(zouts, bounds[2:]))
+        if Arange is not None:
+            mask &= _inRange(nins + zins, Arange) | _inRange(nouts + zouts, Arange)
+        if channels is not None:
+            keys = (nouts - nins)*1000 + zouts - zins
+            mask &= np.isin(keys, [dN*1000 + dZ for dN, dZ in channels])
+        inds = np.flatnonzero(mask)
+        if top is not None and top < len(inds):
+            # only the top largest flows are needed, not their order
+            inds = inds[np.argpartition(-fls[inds], top)[:top]]
+        youts = np.where(youts[inds] < ymin, -np.inf, youts[inds])
+        self.addFlowsFromZN(nins[inds], zins[inds], yins[inds],
+                            nouts[inds], zouts[inds], youts, fls[inds])
 
         self.sort()
+        self.provenance = dict(paths=[path], tmin=self.time, tmax=self.time, ymin=ymin, flmin=flmin)
 
-        if len(self.flows) == 0:
+        if self._nflow == 0:
             raise RuntimeError("No flows in {}".format(path))
 
     def get_fake_dt(self):
+        '''
+        returns the time since the previous flowfile divided by snapshot_every
+        from the .par file, both are looked up in the DirIndex of the directory
+        '''
         if self.num == 0:
             return 0
-        base = '/'.join(self.path.split('/')[:-2])
-        for file in os.listdir(base):
-            if '.par' in file:
-                parfile = '{}/{}'.format(base, file)
-                with open(parfile) as pf:
-                    for line in pf:
-                        if 'snapshot_every' in line:
-                            out_every = int(line.split('=')[-1].strip())
-                            break
-                break
-            else:
-                out_every = 1
-
-        prev_path = '_'.join(self.path.split('_')[:-1]) + '_{:04d}.dat'.format(self.num-1)
-        if not os.path.isfile(prev_path):
+        index = DirIndex(os.path.dirname(self.path) or '.')
+        match = PATTERN.match(os.path.basename(self.path))
+        prev = index.find(match.group(1), self.num-1) if match else -1
+        if prev < 0:
             return 1
-
-        with open(prev_path, 'r') as ff:
-            ff.readline()
-            header = ff.readline()
-            prev_time, _, _ = np.array(header.split()).astype(float)
-        return (self.time - prev_time)/out_every
+        return (self.time - index.time[prev])/index.out_every
 
     def __repr__(self):
-        return "FlowFile at {}: {} flows".format(self.path, len(self.flows))
+        return "FlowFile at {}: {} flows".format(self.path, self._nflow)
@@ -0,0 +1,202 @@
+import os
+from .. import np, getNZ
+from .flowcollection import FlowCollection, _netFlows
+from .integrate import iterFlowFiles
+from .dirindex import DirIndex
+from .isotopecollection import _key
+from .channels import CHANNEL_NAMES, classify
+
+# isotope keys (Z*1000+N) are smaller than this, edges are keyed by in*_EDGE+out
+_EDGE = 1000000
+
+
+class FlowSeries(object):
+    '''
+    All flowfiles of a run as one (time x flow) array.
+    The run directory is read once, the flows are stored in <store>.npy
+    and memory-mapped, the edge index and header data in <store>.npz.
+    Later instances reuse the store as long as no flowfile changed.
+    Input:
+       path        - directory containing the flowfiles flow_XXXX.dat
+       store       - (optional) path of the store without extension, default <path>/.flowseries
+       rebuild     - (optional) ignore an existing store
+       workers     - (optional) number of processes reading the files, serial by default, see iterFlowFiles
+       kwargs are passed to FlowFile (e.g. ymin, flmin)
+    Attributes:
+    - paths, time, dt, temp, dens  - arrays with one entry per flowfile
+    - N, Z, Y                      - isotopes, Y is the highest abundance in all files
+    - iso_in, iso_out              - isotope indices of the flows (edges)
+    - flows                        - (number of files, number of edges) array of flows
+    Methods:
+    - window
+    - integrate
+    - history
+    - channelHistory
+    Indexing with a slice or index array returns a FlowSeries with the selected files
+    '''
+
+    def __init__(self, path, store=None, rebuild=False, workers=1, **kwargs):
+        self.path = path
+        self.store = os.path.join(path, '.flowseries') if store is None else store
+        paths = list(DirIndex(path).select('flow').paths)
+        if len(paths) == 0:
+            raise RuntimeError("No flowfiles in {}".format(path))
+        stamps = np.array([os.stat(p).st_mtime_ns for p in paths])
+        options = repr(sorted(kwargs.items()))
+        if rebuild or not self._load(paths, stamps, options):
+            self._build(paths, stamps, options, workers, kwargs)
+
+    def _load(self, paths, stamps, options):
+        '''
+        load the store if it was built from the same files with the same options
+        returns True on success
+        '''
+        try:
+            with np.load(self.store + '.npz') as meta:
+                if (list(meta['paths']) != paths or not np.array_equal(meta['stamps'], stamps)
+                        or str(meta['options']) != options):
+                    return False
+                for name in ('time', 'dt', 'temp', 'dens', 'N', 'Z', 'Y', 'iso_in', 'iso_out'):
+                    setattr(self, name, meta[name])
+            self.flows = np.load(self.store + '.npy', mmap_mode='r')
+        except (OSError, KeyError, ValueError):
+            return False
+        # the array may belong to a store replaced while the meta data was read
+        if self.flows.shape != (len(paths), len(self.iso_in)):
+            return False
+        self.paths = np.array(paths)
+        return True
+
+    def _build(self, paths, stamps, options, workers, kwargs):
+        '''
+        read all flowfiles and write the store
+        '''
+        import tempfile
+        header = np.empty((len(paths), 4))
+        iso_keys = np.empty(0, dtype=int)
+        iso_Y = np.empty(0)
+        # known edge keys sorted with their ids, and all edge keys in order of their id
+        known, known_ids = np.empty(0, dtype=int), np.empty(0, dtype=int)
+        edge_keys = []
+        n_edges = 0
+
+        # first pass: build the edge index and spool the flows of every file to a scratch file
+        with tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(self.store))) as spool:
+            for ii, ff in enumerate(iterFlowFiles(paths, workers=workers, **kwargs)):
+                header[ii] = ff.time, ff.dt, ff.temp, ff.dens
+                keys = _key(ff.N, ff.Z)
+                iso_keys, inverse = np.unique(np.concatenate((iso_keys, keys)), return_inverse=True)
+                Y = np.full(len(iso_keys), np.nan)
+                np.fmax.at(Y, inverse, np.concatenate((iso_Y, ff.Y)))
+                iso_Y = Y
+
+                ekeys = keys[ff.iso_in]*_EDGE + keys[ff.iso_out]
+                pos = np.minimum(np.searchsorted(known, ekeys), max(len(known)-1, 0))
+                found = known[pos] == ekeys if len(known) else np.zeros(len(ekeys), dtype=bool)
+                ids = np.empty(len(ekeys), dtype=int)
+                ids[found] = known_ids[pos[found]]
+                new = np.unique(ekeys[~found])
+                ids[~found] = n_edges + np.searchsorted(new, ekeys[~found])
+                if len(new):
+                    known = np.concatenate((known, new))
+                    known_ids = np.concatenate((known_ids, n_edges + np.arange(len(new))))
+                    order = np.argsort(known, kind='stable')
+                    known, known_ids = known[order], known_ids[order]
+                    edge_keys.append(new)
+                    n_edges += len(new)
+                np.save(spool, ids)
+                np.save(spool, ff.flow)
+
+            # second pass: fill the (time x edge) array from the scratch file
+            # the store is only ever replaced as a whole, other instances may still map the old one
+            tmp = '{}.npy.{}.tmp'.format(self.store, os.getpid())
+            flows = np.lib.format.open_memmap(tmp, mode='w+', dtype=float, shape=(len(paths), n_edges))
+            spool.seek(0)
+            for ii in range(len(paths)):
+                ids = np.load(spool)
+                flows[ii] = np.bincount(ids, weights=np.load(spool), minlength=n_edges)
+            flows.flush()
+            del flows
+
+        edge_keys = np.concatenate(edge_keys) if edge_keys else np.empty(0, dtype=int)
+        Z, N = np.divmod(iso_keys, 1000)
+        meta = dict(time=header[:, 0], dt=header[:, 1], temp=header[:, 2], dens=header[:, 3],
+                    N=N, Z=Z, Y=iso_Y,
+                    iso_in=np.searchsorted(iso_keys, edge_keys // _EDGE),
+                    iso_out=np.searchsorted(iso_keys, edge_keys % _EDGE))
+        tmp_meta = '{}.npz.{}.tmp'.format(self.store, os.getpid())
+        with open(tmp_meta, 'wb') as ff:
+            np.savez(ff, paths=np.array(paths), stamps=stamps, options=np.array(options), **meta)
+        os.replace(tmp, self.store + '.npy')
+        os.replace(tmp_meta, self.store + '.npz')
+        for name, value in meta.items():
+            setattr(self, name, value)
+        self.flows = np.load(self.store + '.npy', mmap_mode='r')
+        self.paths = np.array(paths)
+
+    def __getitem__(self, index):
+        new = FlowSeries.__new__(FlowSeries)
+        new.__dict__.update(self.__dict__)
+        for name in ('paths', 'time', 'dt', 'temp', 'dens', 'flows'):
+            setattr(new, name, getattr(self, name)[index])
+        return new
+
+    def window(self, tmin=-np.inf, tmax=np.inf):
+        '''
+        returns a FlowSeries with the flowfiles with tmin <= time <= tmax
+        '''
+        inds = np.flatnonzero((self.time >= tmin) & (self.time <= tmax))
+        if len(inds) == 0:
+            return self[0:0]
+        return self[inds[0]:inds[-1]+1]
+
+    def integrate(self, weights=None):
+        '''
+        returns a FlowCollection with the flows summed over all files,
+        reverse flows are subtracted from each other.
+        weights - (optional) array with one weight per file, e.g. dt
+        '''
+        if weights is None:
+            total = self.flows.sum(axis=0)
+        else:
+            total = np.asarray(weights, dtype=float).dot(self.flows)
+        col = FlowCollection()
+        col._setIsotopes(self.N, self.Z, self.Y)
+        col._setFlows(*_netFlows(self.iso_in, self.iso_out, total, len(self.N)))
+        col.sort()
+        if len(self.paths):
+            col.provenance = dict(paths=self.paths.tolist(), tmin=float(self.time.min()),
+                                  tmax=float(self.time.max()), ymin=None, flmin=None)
+        return col
+
+    def _edgeIndex(self, name_in, name_out):
+        '''
+        returns index of the flow from name_in to name_out
+        '''
+        keys = _key(self.N, self.Z)
+        key_in = _key(*getNZ(name_in.lower()))
+        key_out = _key(*getNZ(name_out.lower()))
+        ind = np.flatnonzero((keys[self.iso_in] == key_in) & (keys[self.iso_out] == key_out))
+        if len(ind) == 0:
+            raise ValueError("No flow {}->{} in {}".format(name_in, name_out, self))
+        return ind[0]
+
+    def history(self, name_in, name_out):
+        '''
+        returns the flow from isotope name_in to isotope name_out in every file
+        '''
+        return np.array(self.flows[:, self._edgeIndex(name_in, name_out)])
+
+    def channelHistory(self):
+        '''
+        returns (number of files, number of channels) array with the sum of the flows
+        of every reaction channel (see CHANNEL_NAMES) in every file
+        '''
+        channels = classify(self.N[self.iso_out] - self.N[self.iso_in],
+                            self.Z[self.iso_out] - self.Z[self.iso_in])
+        onehot = np.zeros((len(channels), len(CHANNEL_NAMES)))
+        onehot[np.arange(len(channels)), channels] = 1
+        return self.flows.dot(onehot)
+
+    def __repr__(self):
+        return "FlowSeries at {}: {} files, {} flows".format(self.path, *self.flows.shape)
@@ -1,24 +1,87 @@
+from .. import np
+
+
 class Flow(object):
     '''
+    Immutable record of a flow between two isotopes
     Input:
-       nuc_in  - (nucleus object) target nucleus
-       nuc_out - (nucleus object) product nucleus
+       iso_in  - (Isotope object) target nucleus
+       iso_out - (Isotope object) product nucleus
        flow    - value of flow
     Attributes:
-       nuc_in, nuc_out, dZ, dN, Z0, N0, flow
+       iso_in, iso_out, dZ, dN, Z0, N0, flow
     '''
 
+    __slots__ = ('iso_in', 'iso_out', 'flow')
+
     def __init__(self, iso_in, iso_out, flow):
-        self.Z0 = iso_in.Z
-        self.N0 = iso_in.N
-        self.dZ = iso_out.Z - iso_in.Z
-        self.dN = iso_out.N - iso_in.N
-        self.flow = flow
-        self.iso_in = iso_in
-        self.iso_out = iso_out
+        object.__setattr__(self, 'iso_in', iso_in)
+        object.__setattr__(self, 'iso_out', iso_out)
+        object.__setattr__(self, 'flow', flow)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Flow is immutable")
+
+    def __reduce__(self):
+        return Flow, (self.iso_in, self.iso_out, self.flow)
+
+    @property
+    def Z0(self):
+        return self.iso_in.Z
+
+    @property
+    def N0(self):
+        return self.iso_in.N
+
+    @property
+    def dZ(self):
+        return self.iso_out.Z - self.iso_in.Z
+
+    @property
+    def dN(self):
+        return self.iso_out.N - self.iso_in.N
 
     def __repr__(self):
         return "flow: {}->{}".format(self.iso_in.Name, self.iso_out.Name)
 
     def __str__(self):
         return "{}->{}".format(self.iso_in.name, self.iso_out.name)
+
+
+class FlowArray(object):
+    '''
+    Sequence of the flows of a FlowCollection,
+    Flow records are only created when they are accessed
+    Input:
+       isotopes - array of Isotope objects
+       iso_in   - array of indices of target isotopes
+       iso_out  - array of indices of product isotopes
+       flow     - array of flow values
+    Indexing with an integer returns a Flow,
+    indexing with a slice, mask or index array returns a FlowArray
+    '''
+
+    __slots__ = ('isotopes', 'iso_in', 'iso_out', 'flow')
+
+    def __init__(self, isotopes, iso_in, iso_out, flow):
+        self.isotopes = isotopes
+        self.iso_in = iso_in
+        self.iso_out = iso_out
+        self.flow = flow
+
+    def __len__(self):
+        return len(self.flow)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return Flow(self.isotopes[self.iso_in[index]], self.isotopes[self.iso_out[index]],
+                        float(self.flow[index]))
+        return FlowArray(self.isotopes, self.iso_in[index], self.iso_out[index], self.flow[index])
+
+    def __iter__(self):
+        isos = self.isotopes
+        for i_in, i_out, fl in zip(self.iso_in.tolist(), self.iso_out.tolist(), self.flow.tolist()):
+            yield Flow(isos[i_in], isos[i_out], fl)
+
+    def __repr__(self):
+        return "FlowArray: {} flows".format(len(self))
@@ -0,0 +1,309 @@
+import os
+from collections import deque
+from itertools import islice
+from .. import np
+from ..profiling import instrument
+from .flowfile import FlowFile
+from .reader import readHeader
+from .dirindex import DirIndex, PATTERN, _outEvery
+
+
+def _printProgress(done, total):
+    print("Progress: {:4.1f}%".format(done/total*100), end='\r')
+
+
+def iterFlowFiles(paths, workers=1, window=None, **kwargs):
+    '''
+    yields a FlowFile for every path in paths in order
+    workers - number of processes reading the files, by default the files are read
+              serially in this process, a process pool is only started with workers > 1
+              (scripts doing so need an if __name__ == '__main__' guard on spawn platforms),
+              workers=None uses one process per cpu
+    window  - maximal number of files read ahead, defaults to 2*workers
+    kwargs are passed to FlowFile
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if window is None:
+        window = 2*workers
+    if workers == 1 or len(paths) < 2:
+        for path in paths:
+            yield FlowFile(path, **kwargs)
+        return
+
+    # only imported when needed, it slows down the start of every worker
+    from concurrent.futures import ProcessPoolExecutor
+    paths = iter(paths)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque(pool.submit(FlowFile, path, **kwargs) for path in islice(paths, window))
+        while pending:
+            flowfile = pending.popleft().result()
+            for path in islice(paths, 1):
+                pending.append(pool.submit(FlowFile, path, **kwargs))
+            yield flowfile
+
+
+class TreeSum(object):
+    '''
+    sums up collections pairwise like a binary tree
+    only one partial sum per tree level is kept, so adding n collections
+    holds at most log2(n) partial sums in memory
+    Methods:
+    - add
+    - result
+    '''
+
+    def __init__(self):
+        self.stack = []
+
+    def add(self, collection):
+        '''
+        add collection to the sum
+        '''
+        level = 0
+        while self.stack and self.stack[-1][0] == level:
+            collection = self.stack.pop()[1] + collection
+            level += 1
+        self.stack.append((level, collection))
+
+    def result(self):
+        '''
+        returns the sum of all added collections, None if nothing was added
+        '''
+        total = None
+        for _, collection in reversed(self.stack):
+            total = collection if total is None else collection + total
+        return total
+
+
+def _headers(paths):
+    '''
+    returns time and temperature of the flowfiles in paths,
+    looked up in the DirIndex of their directories
+    '''
+    lookup = {}
+    header = np.empty((len(paths), 2))
+    for ii, path in enumerate(paths):
+        path = os.path.abspath(path)
+        base = os.path.dirname(path)
+        if base not in lookup:
+            index = DirIndex(base)
+            lookup[base] = index, dict(zip(index.paths.tolist(), range(len(index.paths))))
+        index, positions = lookup[base]
+        pos = positions.get(path)
+        if pos is None:
+            time, _, temp, _ = readHeader(path)
+        else:
+            time, temp = index.time[pos], index.temp[pos]
+        header[ii] = time, temp
+    return header.T
+
+
+def _inWindow(time, temp, tmin=-np.inf, tmax=np.inf, Tmin=-np.inf, Tmax=np.inf):
+    '''
+    returns mask of the files with tmin <= time <= tmax and Tmin <= temp <= Tmax
+    '''
+    return (time >= tmin) & (time <= tmax) & (temp >= Tmin) & (temp <= Tmax)
+
+
+def _net(collection):
+    '''
+    returns the net flows of collection as FlowCollection, None if collection is None
+    a sum of a single file is reduced the same way as the sum of several
+    '''
+    return None if collection is None else collection.net()
+
+
+def _weighted(flowfile, weight, every):
+    '''
+    returns flowfile with the flows multiplied by the time it covers if weight is 'dt'
+    '''
+    if weight is None:
+        return flowfile
+    # a flowfile is written every snapshot_every steps of length dt
+    return flowfile._subCollection(slice(None), flowfile.flow * flowfile.dt * every)
+
+
+@instrument()
+def IntegrateWindows(paths, windows=None, checkpoints=None, weight=None, quite=False, workers=1,
+                     window=None, progress=None, **kwargs):
+    '''
+    Integrates the flowfiles in paths over several windows and up to several checkpoints
+    in a single pass, every file is read once.
+    windows     - dict of name: limits, limits is a dict with any of tmin, tmax, Tmin, Tmax,
+                  e.g. {'freezeout': dict(Tmax=3)} for the files with temperature <= 3 GK
+    checkpoints - times, the running sum of all files with time <= checkpoint is returned for each
+    weight      - None: the flows are summed
+                  'dt': the flows of every file are weighted by the time it covers,
+                        dt (see FlowFile) times snapshot_every from the .par file
+    Time and temperature are looked up in the DirIndex of the files,
+    files outside of all windows and after the last checkpoint are not read.
+    quite, workers, window, progress and kwargs as in IntegrateFlows
+    returns dict of name: FlowCollection and list of FlowCollections at the sorted checkpoints,
+    None where no file was added, the FlowCollections always hold net flows
+    '''
+    if weight not in (None, 'dt'):
+        raise ValueError("weight has to be None or 'dt', not {}".format(weight))
+    paths = [str(path) for path in paths]
+    windows = {} if windows is None else windows
+    checkpoints = np.sort(np.atleast_1d(checkpoints)) if checkpoints is not None else np.empty(0)
+    if len(checkpoints) or any(windows.values()):
+        time, temp = _headers(paths)
+    else:
+        time, temp = np.zeros(len(paths)), np.zeros(len(paths))
+    inside = {name: _inWindow(time, temp, **limits) for name, limits in windows.items()}
+    # files are added to the sum of the first checkpoint at or after their time
+    segment = np.searchsorted(checkpoints, time, side='left')
+    needed = segment < len(checkpoints)
+    for mask in inside.values():
+        needed |= mask
+    read = np.flatnonzero(needed)
+
+    every = {}
+    if weight == 'dt':
+        for base in set(os.path.dirname(os.path.abspath(paths[pos])) for pos in read):
+            every[base] = _outEvery(os.path.dirname(base))
+
+    if progress is None and not quite:
+        progress = _printProgress
+    sums = {name: TreeSum() for name in windows}
+    segments = [TreeSum() for _ in checkpoints]
+    flowfiles = iterFlowFiles([paths[pos] for pos in read], workers=workers, window=window, **kwargs)
+    for ii, (pos, flowfile) in enumerate(zip(read, flowfiles)):
+        if weight is not None:
+            flowfile = _weighted(flowfile, weight, every[os.path.dirname(os.path.abspath(paths[pos]))])
+        for name, mask in inside.items():
+            if mask[pos]:
+                sums[name].add(flowfile)
+        if segment[pos] < len(checkpoints):
+            segments[segment[pos]].add(flowfile)
+        if progress is not None:
+            progress(ii+1, len(read))
+
+    cumulative, total = [], None
+    for tree in segments:
+        part = tree.result()
+        if part is not None:
+            total = part if total is None else total + part
+        cumulative.append(_net(total))
+    return {name: _net(tree.result()) for name, tree in sums.items()}, cumulative
+
+
+@instrument(rows=lambda result, args: len(result.provenance['paths']))
+def IntegrateFlows(paths, quite=False, workers=1, window=None, progress=None, weight=None,
+                   tmin=None, tmax=None, Tmin=None, Tmax=None, **kwargs):
+    '''
+    Integrates all flowfiles in paths.
+    Files are read serially unless workers > 1 processes are requested (see iterFlowFiles),
+    at most window of them are held in memory at once.
+    The partial sums are merged pairwise (see TreeSum).
+    The provenance of the result lists the paths, time range and options,
+    save the result with its save method.
+    progress  - function called as progress(done, total) after every file
+                prints the progress by default unless quite is True
+    weight    - None or 'dt', see IntegrateWindows
+    tmin, tmax, Tmin, Tmax - (optional) only integrate the files in this range
+                of time and temperature (GK), see IntegrateWindows for several ranges at once
+    kwargs are passed to FlowFile
+    returns a FlowCollection with the net flows, also for a single file, None if no file was added
+    '''
+    limits = dict(tmin=tmin, tmax=tmax, Tmin=Tmin, Tmax=Tmax)
+    limits = {key: value for key, value in limits.items() if value is not None}
+    sums, _ = IntegrateWindows(paths, {'all': limits}, weight=weight, quite=quite, workers=workers,
+                               window=window, progress=progress, **kwargs)
+    int_flows = sums['all']
+    if not quite and int_flows is not None:
+        print(F"Done: {len(int_flows.flow)} Flows on {len(int_flows.N)} Nuclei")
+    return int_flows
+
+
+class IncrementalIntegrator(object):
+    '''
+    Integrates the flowfiles of a directory that is still being written to.
+    The running sum is kept in store together with a manifest of the files
+    already added to it (path, modification time and size).
+    update only reads the files that were added since, if a file of the manifest
+    changed or disappeared or the options differ, the sum is rebuilt from all files.
+    Input:
+       path     - directory with the flowfiles
+       store    - (optional) .npz file of the sum, default <path>/.integrated.npz
+       workers, window - see iterFlowFiles
+       kwargs are passed to IntegrateFlows, e.g. weight or ymin
+    Attributes:
+    - result    - FlowCollection with the sum of the last update
+    - added     - paths read by the last update
+    Methods:
+    - update
+    '''
+
+    def __init__(self, path, store=None, workers=1, window=None, **kwargs):
+        self.path = path
+        self.store = os.path.join(path, '.integrated.npz') if store is None else store
+        self.workers = workers
+        self.window = window
+        self.kwargs = kwargs
+        self.options = repr(sorted(kwargs.items()))
+        self.result = None
+        self.added = []
+
+    def _scan(self):
+        '''
+        returns {path: (mtime, size)} of all flowfiles in path
+        '''
+        files = []
+        for entry in os.scandir(self.path):
+            match = PATTERN.match(entry.name)
+            if match and match.group(1) == 'flow':
+                stat = entry.stat()
+                files.append((int(match.group(2)), entry.path, (stat.st_mtime_ns, stat.st_size)))
+        return {path: stamp for _, path, stamp in sorted(files)}
+
+    def _load(self):
+        '''
+        returns the stored sum and its manifest {path: (mtime, size)},
+        (None, {}) if there is no store or it was built with other options
+        '''
+        if not os.path.isfile(self.store):
+            return None, {}
+        from .flowcollection import FlowCollection
+        with np.load(self.store) as arrays:
+            if 'manifest_paths' not in arrays.files or str(arrays['manifest_options']) != self.options:
+                return None, {}
+            manifest = dict(zip(arrays['manifest_paths'].tolist(),
+                                zip(arrays['manifest_mtime'].tolist(), arrays['manifest_size'].tolist())))
+        total = FlowCollection.load(self.store, mmap=False)
+        # an empty sum is stored while no file was in the range
+        return (total if total._niso else None), manifest
+
+    def update(self, quite=True, progress=None, rebuild=False):
+        '''
+        adds the flowfiles written since the last update to the sum and stores it
+        rebuild - start from scratch
+        quite, progress - see IntegrateFlows
+        returns the FlowCollection with the sum of all flowfiles, None if there are none
+        '''
+        current = self._scan()
+        total, manifest = (None, {}) if rebuild else self._load()
+        if any(current.get(path) != stamp for path, stamp in manifest.items()):
+            # an integrated file changed, its old flows can not be taken out of the sum
+            total, manifest = None, {}
+        self.added = [path for path in current if path not in manifest]
+        if self.added:
+            new = IntegrateFlows(self.added, quite=quite, workers=self.workers, window=self.window,
+                                 progress=progress, **self.kwargs)
+            # new is None if the time or temperature range excludes all added files,
+            # they are still recorded in the manifest so they are not read again
+            if new is not None:
+                total = new if total is None else total + new
+            paths = list(manifest) + self.added
+            from .flowcollection import FlowCollection
+            stored = FlowCollection() if total is None else total
+            stored.save(self.store, manifest_paths=np.array(paths, dtype=str),
+                       manifest_mtime=np.array([current[path][0] for path in paths], dtype=np.int64),
+                       manifest_size=np.array([current[path][1] for path in paths], dtype=np.int64),
+                       manifest_options=np.array(self.options))
+        self.result = total
+        return total
+
+    def __repr__(self):
+        return "IncrementalIntegrator: {}".format(self.path)
@@ -1,15 +1,40 @@
-from .. import np, getName
-from ..isotope import Isotope
+from .. import np, getName, getNZ
+from ..isotope import Isotope, _intern
+from ..profiling import instrument
+
+
+def _reserve(arr, size):
+    '''
+    return arr or a larger copy of it that can hold at least size entries
+    capacity is doubled so that appending one entry at a time is amortized O(1)
+    '''
+    if size <= len(arr):
+        return arr
+    new = np.empty(max(size, 2*len(arr), 16), dtype=arr.dtype)
+    new[:len(arr)] = arr
+    return new
+
+
+def _key(N, Z):
+    '''
+    returns Z*1000+N, the chk of an isotope
+    '''
+    return Z*1000 + N
 
 
 class IsotopeCollection(object):
     '''
     contains isotopes and their flows
+    Isotopes are stored as parallel arrays, Isotope objects are only
+    created when the isotopes attribute is accessed
     Attributes:
-    - isotopes
-    - flows
+    - isotopes     - array of isotope objects
+    - N, Z, Y      - arrays of neutron number, proton number and abundance
     Methods:
+    - setIsotopes
     - getIsotope
+    - getAbundance
+    - getIndices
     - sort
     - getMaxY
     - getBounds
@@ -20,9 +45,107 @@ class IsotopeCollection(object):
 
     def __init__(self,  ymin=1e-10):
         self.ymin = ymin
-        self.isotopes = np.array([])
+        self._niso = 0
+        self._N = np.empty(0, dtype=int)
+        self._Z = np.empty(0, dtype=int)
+        self._Y = np.empty(0, dtype=float)
+        self._index = {}
+        self._invalidate()
+
+    @property
+    def N(self):
+        '''neutron numbers of isotopes'''
+        return self._N[:self._niso]
+
+    @property
+    def Z(self):
+        '''proton numbers of isotopes'''
+        return self._Z[:self._niso]
+
+    @property
+    def Y(self):
+        '''abundances of isotopes'''
+        return self._Y[:self._niso]
+
+    @property
+    def isotopes(self):
+        '''
+        array of the Isotope objects, created on first access
+        the abundances are in Y
+        '''
+        if self._isotopes is None:
+            isos = np.empty(self._niso, dtype=object)
+            isos[:] = [_intern(N, Z) for N, Z in zip(self.N.tolist(), self.Z.tolist())]
+            self._isotopes = isos
+        return self._isotopes
+
+    def setIsotopes(self, other):
+        '''
+        replace all isotopes by the ones of the IsotopeCollection other, with their abundances
+        '''
+        self._setIsotopes(other.N, other.Z, other.Y)
+
+    def _setIsotopes(self, N, Z, Y):
+        '''
+        replace all isotopes by the ones given in the arrays N, Z and Y
+        '''
+        self._N = np.array(N, dtype=int)
+        self._Z = np.array(Z, dtype=int)
+        self._Y = np.array(Y, dtype=float)
+        self._niso = len(self._N)
+        keys = _key(self._N, self._Z).tolist()
+        # fill in reverse so that the first of duplicate isotopes is found
+        self._index = dict(zip(keys[::-1], range(self._niso-1, -1, -1)))
+        self._invalidate()
+
+    def _appendIsotope(self, N, Z, Y):
+        '''
+        append an isotope to the arrays and return its index
+        '''
+        ind = self._niso
+        self._N = _reserve(self._N, ind+1)
+        self._Z = _reserve(self._Z, ind+1)
+        self._Y = _reserve(self._Y, ind+1)
+        self._N[ind], self._Z[ind], self._Y[ind] = N, Z, Y
+        self._niso += 1
+        self._index.setdefault(_key(int(N), int(Z)), ind)
+        self._invalidate()
+        return ind
 
-    def addIsotope(self, **kwargs):
+    def _invalidate(self):
+        '''
+        drop cached objects after the arrays changed
+        '''
+        self._isotopes = None
+        self._sorter = None
+        self._sorted_keys = None
+
+    def _isotopeIndex(self, name=None, Z=None, N=None):
+        '''
+        returns index of isotope given by name or Z and N, -1 if not present
+        '''
+        if name is not None:
+            N, Z = getNZ(name.lower())
+        elif Z is None or N is None:
+            raise ValueError("Give name, Z and N")
+        return self._index.get(_key(int(N), int(Z)), -1)
+
+    def getIndices(self, N, Z):
+        '''
+        returns the indices of the isotopes given by the arrays N and Z
+        -1 for isotopes that are not in the collection
+        '''
+        if self._sorter is None:
+            keys = _key(self.N, self.Z)
+            self._sorter = np.argsort(keys, kind='stable')
+            self._sorted_keys = keys[self._sorter]
+        keys = _key(np.asarray(N, dtype=int), np.asarray(Z, dtype=int))
+        if self._niso == 0:
+            return np.full(keys.shape, -1)
+        pos = np.minimum(np.searchsorted(self._sorted_keys, keys), self._niso-1)
+        return np.where(self._sorted_keys[pos] == keys, self._sorter[pos], -1)
+
+    def addIsotope(self, Y=np.nan, **kwargs):
         '''
         Add a isotope object from either:
         - name
@@ -31,7 +154,7 @@ class IsotopeCollection(object):
         - Y
         '''
         iso = Isotope(**kwargs)
-        self.isotopes = np.append(self.isotopes, iso)
+        self._appendIsotope(iso.N, iso.Z, Y)
         return iso
 
     def getIsotope(self, name=None, Z=None, N=None):
@@ -40,36 +163,49 @@ class IsotopeCollection(object):
         - name
         - Z and N
         '''
-        if name is None:
-            if Z is None or N is None:
-                raise ValueError("Give name, Z and N")
-            name = getName(N, Z)
-        ind = int(np.argwhere(self.isotopes.astype(str) == name.lower()))
+        ind = self._isotopeIndex(name=name, Z=Z, N=N)
+        if ind < 0:
+            raise ValueError("{} not in {}".format(name or getName(N, Z), self))
 
         return self.isotopes[ind]
 
+    def getAbundance(self, name=None, Z=None, N=None):
+        '''
+        Get the abundance of a isotope from either:
+        - name
+        - Z and N
+        '''
+        ind = self._isotopeIndex(name=name, Z=Z, N=N)
+        if ind < 0:
+            raise ValueError("{} not in {}".format(name or getName(N, Z), self))
+        return self.Y[ind]
+
+    def _reorderIsotopes(self, order):
+        '''
+        reorder isotopes so that the new isotope i is the old isotope order[i]
+        '''
+        self._setIsotopes(self.N[order], self.Z[order], self.Y[order])
+
+    @instrument(rows=lambda result, args: len(args['self'].N))
     def sort(self):
         '''
         sort isotopes by abundance
         '''
-        abus = np.vectorize(lambda i: i.Y)(self.isotopes)
-        self.isotopes = self.isotopes[np.argsort(abus)]
+        self._reorderIsotopes(np.argsort(self.Y, kind='stable'))
 
     def getMaxY(self):
         '''
         returns maximal abundance in isotopecollection
         '''
-        return max(list(map(lambda n: n.Y, self.isotopes)))
+        return np.max(self.Y)
 
     def getBounds(self, for_plot=False):
         '''
         returns (minN, minZ, maxN, maxZ)
         if for_plot is True add and subtract .5 so that ax.axis(IsotopeCollection().getBounds()) works
         '''
-        maxZ = max(list(map(lambda n: n.Z, self.isotopes)))
-        maxN = max(list(map(lambda n: n.N, self.isotopes)))
-        minZ = min(list(map(lambda n: n.Z, self.isotopes)))
-        minN = min(list(map(lambda n: n.N, self.isotopes)))
+        maxZ, minZ = int(self.Z.max()), int(self.Z.min())
+        maxN, minN = int(self.N.max()), int(self.N.min())
         if for_plot:
             return minN-.5, maxN+.5, minZ-.5, maxZ+.5
         else:
@@ -77,21 +213,24 @@ class IsotopeCollection(object):
 
     def __add__(self, other):
         new = IsotopeCollection(ymin=min(self.ymin, other.ymin))
-
-        isos1 = self.isotopes.astype(str)
-        abs1 = np.vectorize(lambda n: n.Y)(self.isotopes)
-
-        isos2 = other.isotopes.astype(str)
-        abs2 = np.vectorize(lambda n: n.Y)(other.isotopes)
-
-        for name, i1, i2 in zip(*np.intersect1d(isos1, isos2, assume_unique=True, return_indices=True)):
-            new.addIsotope(name=name, Y=max(abs1[i1], abs2[i2]))
-        for name in np.setxor1d(isos1, isos2, assume_unique=True):
-            Y = np.concatenate((abs1[isos1 == name], abs2[isos2 == name]))[0]
-            new.addIsotope(name=name, Y=Y)
-
+        N, Z, Y, _, _ = self._mergeIsotopes(other)
+        new._setIsotopes(N, Z, Y)
         new.sort()
         return new
 
+    def _mergeIsotopes(self, other):
+        '''
+        returns N, Z and Y of the union of the isotopes in self and other
+        and the indices of the isotopes of self and other in the union
+        isotopes in both collections get the higher abundance
+        '''
+        keys = np.concatenate((_key(self.N, self.Z), _key(other.N, other.Z)))
+        Ys = np.concatenate((self.Y, other.Y))
+        keys, inverse = np.unique(keys, return_inverse=True)
+        Y = np.full(len(keys), np.nan)
+        np.fmax.at(Y, inverse, Ys)
+        Z, N = np.divmod(keys, 1000)
+        return N, Z, Y, inverse[:self._niso], inverse[self._niso:]
+
     def __repr__(self):
-        return "IsotopeCollection: {} ".format(len(self.flows))
+        return "IsotopeCollection: {} isotopes".format(self._niso)
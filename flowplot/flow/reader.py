@@ -0,0 +1,102 @@
+import os
+from .. import np
+from ..profiling import instrument
+
+'''
+Contains routines to read WinNet flowfiles and snapshots:
+- readHeader
+- readFile
+- loadNpz
+'''
+
+# appended to the path of a flowfile or snapshot to get the path of its cache
+CACHE_SUFFIX = '.cache.npz'
+
+
+def readHeader(path):
+    '''
+    returns (time, dt, temp, dens) from the header of a flowfile or snapshot
+    dt is nan if the file has no dt column
+    '''
+    with open(path, 'r') as ff:
+        header = ff.readline()
+        values = np.array(ff.readline().split()).astype(float)
+    if 'dt' in header:
+        time, dt, temp, dens = values[:4]
+    else:
+        time, temp, dens = values[:3]
+        dt = np.nan
+    return time, dt, temp, dens
+
+
+@instrument(rows=lambda result, args: len(result[1]))
+def readFile(path, cache=False):
+    '''
+    returns the header (time, dt, temp, dens) and the table of a flowfile or snapshot
+    as 2d array with one row per line
+    cache:  if True the table is stored in a binary file next to path.
+            Later calls memory-map this file instead of parsing the text
+            as long as the size and modification time of path did not change
+    '''
+    if cache:
+        # zipfile is only imported when caching, it slows down the import of the package
+        import zipfile
+        stat = os.stat(path)
+        key = np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+        cpath = path + CACHE_SUFFIX
+        if os.path.isfile(cpath):
+            try:
+                cached = loadNpz(cpath)
+                if np.array_equal(cached['key'], key):
+                    return tuple(cached['header']), cached['table']
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                pass
+
+    header = readHeader(path)
+    # numpy's loadtxt is implemented in C, comments=None skips the comment search
+    table = np.loadtxt(path, skiprows=3, comments=None, ndmin=2)
+
+    if cache:
+        tmp = '{}.{}.tmp'.format(cpath, os.getpid())
+        try:
+            with open(tmp, 'wb') as cf:
+                np.savez(cf, key=key, header=np.array(header), table=table)
+            os.replace(tmp, cpath)
+        except OSError:
+            # no write access, just do without cache
+            if os.path.isfile(tmp):
+                os.remove(tmp)
+    return header, table
+
+
+def loadNpz(path):
+    '''
+    returns a dict with the arrays of an uncompressed .npz file
+    the arrays are memory-mapped instead of read into memory
+    compressed or empty arrays are read normally
+    '''
+    import zipfile
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as ff:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with zf.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            # skip the local file header of the member to get to the .npy data
+            ff.seek(info.header_offset + 26)
+            len_name, len_extra = np.frombuffer(ff.read(4), dtype='<u2')
+            ff.seek(info.header_offset + 30 + int(len_name) + int(len_extra))
+            version = np.lib.format.read_magic(ff)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(ff)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(ff)
+            if dtype.hasobject or np.prod(shape) == 0:
+                ff.seek(info.header_offset + 30 + int(len_name) + int(len_extra))
+                arrays[name] = np.lib.format.read_array(ff)
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=ff.tell(),
+                                     shape=shape, order='F' if fortran else 'C')
+    return arrays
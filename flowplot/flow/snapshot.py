@@ -1,6 +1,6 @@
-from .. import np
-from ..isotope import Isotope
 from .isotopecollection import IsotopeCollection
+from .reader import readFile
+from ..profiling import instrument
 
 
 class Snapshot(IsotopeCollection):
@@ -8,20 +8,18 @@ class Snapshot(IsotopeCollection):
     Get isotopes from snapshot and create a isotopecollection
     Input:
        path     - path to snapfile
+       cache    - (optional) keep a binary copy of the file next to it for faster loading
 
     Atributes:
        path, num, time, temp, dens, isotopes
     '''
 
-    def __init__(self, path):
+    @instrument(rows=lambda result, args: len(args['self'].N))
+    def __init__(self, path, cache=False):
         super(Snapshot, self).__init__()
-        Ns, Zs, Ys = np.loadtxt(path, skiprows=3, usecols=(0, 1, 2), unpack=True)
+        (self.time, _, self.temp, self.dens), table = readFile(path, cache=cache)
+        Ns, Zs, Ys = table[:, :3].T
 
-        with open(path, 'r') as sf:
-            sf.readline()
-            header = sf.readline()
-            self.time, self.temp, self.dens = np.array(header.split()).astype(float)
-
-        self.isotopes = np.array([Isotope(Z=Z, N=N, Y=Y) for N, Z, Y in zip(Ns, Zs, Ys)])
+        self._setIsotopes(Ns, Zs, Ys)
         self.path = path
         self.num = int(path.split("_")[-1][:4])
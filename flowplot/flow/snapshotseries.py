@@ -0,0 +1,127 @@
+import os
+from .. import np, getNZ
+from .reader import readFile
+from .dirindex import DirIndex
+
+
+class SnapshotSeries(object):
+    '''
+    All snapshots of a run as one memory-mapped (time, N, Z) float32 abundance cube.
+    Snapshots are read into the cube on first access, the (N, Z) grid grows
+    when a snapshot has heavier isotopes than the ones read before.
+    The cube is kept in <store>.npy
+    together with the bookkeeping in <store>.npz, so later instances only read
+    snapshots that were not read before or changed since.
+    Input:
+       path        - directory containing the snapshots snapsh_XXXX.dat
+       store       - (optional) path of the store without extension, default <path>/.snapshotseries
+    Attributes:
+    - paths, time, temp, dens      - arrays with one entry per snapshot
+    - Y                            - the (time, N, Z) cube, zero for missing isotopes
+    Methods:
+    - load
+    - abundance
+    - massSums
+    - elementSums
+    Indexing returns the (N, Z) abundance grid(s) of the selected snapshot(s)
+    '''
+
+    def __init__(self, path, store=None):
+        self.path = path
+        self.store = os.path.join(path, '.snapshotseries') if store is None else store
+        index = DirIndex(path).select('snapsh')
+        self.paths, self.time, self.temp, self.dens = index.paths, index.time, index.temp, index.dens
+        if len(self.paths) == 0:
+            raise RuntimeError("No snapshots in {}".format(path))
+        stamps = np.array([os.stat(p).st_mtime_ns for p in self.paths])
+
+        try:
+            with np.load(self.store + '.npz') as meta:
+                if list(meta['paths']) != list(self.paths):
+                    raise ValueError("different snapshots")
+                self.loaded = meta['loaded'] & (meta['stamps'] == stamps)
+            self.Y = np.load(self.store + '.npy', mmap_mode='r+')
+        except (OSError, KeyError, ValueError):
+            # the first snapshot gives the initial size of the grid
+            _, table = readFile(self.paths[0])
+            self.loaded = np.zeros(len(self.paths), dtype=bool)
+            self.Y = self._replace(int(table[:, 0].max())+1, int(table[:, 1].max())+1)
+        self.stamps = stamps
+
+    def load(self, index=slice(None)):
+        '''
+        read the selected snapshots into the cube if they are not loaded yet
+        '''
+        inds = np.atleast_1d(np.arange(len(self.paths))[index])
+        missing = inds[~self.loaded[inds]]
+        for ii in missing:
+            _, table = readFile(self.paths[ii])
+            Ns, Zs = table[:, 0].astype(int), table[:, 1].astype(int)
+            if Ns.max() >= self.Y.shape[1] or Zs.max() >= self.Y.shape[2]:
+                self._grow(max(int(Ns.max())+1, self.Y.shape[1]), max(int(Zs.max())+1, self.Y.shape[2]))
+            self.Y[ii] = 0
+            self.Y[ii, Ns, Zs] = table[:, 2]
+            self.loaded[ii] = True
+        if len(missing):
+            self.Y.flush()
+            tmp = '{}.npz.{}.tmp'.format(self.store, os.getpid())
+            with open(tmp, 'wb') as ff:
+                np.savez(ff, paths=self.paths, stamps=self.stamps, loaded=self.loaded)
+            os.replace(tmp, self.store + '.npz')
+
+    def _grow(self, nN, nZ):
+        '''
+        enlarge the (N, Z) grid of the cube to (nN, nZ), the snapshots read so far are kept
+        '''
+        self.Y = self._replace(nN, nZ, self.Y)
+
+    def _replace(self, nN, nZ, old=None):
+        '''
+        write a new (time, nN, nZ) cube with the loaded snapshots of old and move it into place,
+        instances that still map the previous cube keep their data,
+        returns the new cube
+        '''
+        tmp = '{}.npy.{}.tmp'.format(self.store, os.getpid())
+        new = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=(len(self.paths), nN, nZ))
+        if old is not None:
+            for ii in np.flatnonzero(self.loaded):
+                new[ii, :old.shape[1], :old.shape[2]] = old[ii]
+        new.flush()
+        del new, old
+        os.replace(tmp, self.store + '.npy')
+        return np.load(self.store + '.npy', mmap_mode='r+')
+
+    def __getitem__(self, index):
+        self.load(index)
+        return self.Y[index]
+
+    def abundance(self, name):
+        '''
+        returns the abundance of isotope with name <name> in every snapshot
+        '''
+        N, Z = getNZ(name.lower())
+        self.load()
+        if N >= self.Y.shape[1] or Z >= self.Y.shape[2]:
+            return np.zeros(len(self.paths))
+        return np.array(self.Y[:, N, Z])
+
+    def massSums(self):
+        '''
+        returns the (time, A) array of abundances summed over isotopes with mass number A
+        '''
+        from scipy import sparse
+        self.load()
+        _, nN, nZ = self.Y.shape
+        A = (np.arange(nN)[:, None] + np.arange(nZ)[None, :]).ravel()
+        summation = sparse.csr_matrix((np.ones(len(A)), (np.arange(len(A)), A)), shape=(len(A), A.max()+1))
+        return summation.T.dot(self.Y.reshape(len(self.paths), -1).T).T
+
+    def elementSums(self):
+        '''
+        returns the (time, Z) array of abundances summed over isotopes with proton number Z
+        '''
+        self.load()
+        return self.Y.sum(axis=1, dtype=float)
+
+    def __repr__(self):
+        return "SnapshotSeries at {}: {} snapshots".format(self.path, len(self.paths))
@@ -1,4 +1,22 @@
-from . import Elnames, np, getNZ
+from . import getName, getNZ
+from ._tables import ELNAMES
+
+# the Isotope instances, keyed by chk
+_registry = {}
+
+
+def _intern(N, Z):
+    '''
+    returns the Isotope with N neutrons and Z protons, created only once
+    '''
+    chk = Z*1000 + N
+    iso = _registry.get(chk)
+    if iso is None:
+        iso = object.__new__(Isotope)
+        object.__setattr__(iso, 'N', N)
+        object.__setattr__(iso, 'Z', Z)
+        iso = _registry.setdefault(chk, iso)
+    return iso
 
 
 class Isotope(object):
@@ -6,9 +24,13 @@ class Isotope(object):
     """
     isotope: contains basic information of an isotope.
     For example the name, the name in the network, the amount of protons, neutrons and the mass number
+    Isotopes are immutable and there is only one instance per (N, Z),
+    the abundance is kept by the IsotopeCollection the isotope is in
     """
 
-    def __init__(self, name=None, Z=None, N=None, Y=np.nan, chk=None):
+    __slots__ = ('N', 'Z')
+
+    def __new__(cls, name=None, Z=None, N=None, chk=None):
         """
         Input either of:
           name       - name of the isotope
@@ -16,50 +38,54 @@ class Isotope(object):
           N          - neutron number of isotope
           chk        - Z*1e3+N
         Atributes:
-          A, Z, N, Y,name, Name, el, El
+          A, Z, N, name, Name, el, El, chk
         """
 
         if chk is not None:
-            self.Z = int(chk//1e3)
-            self.N = int(chk - self.Z*1e3)
-            self.A = self.Z + self.N
-            self._get_Name()
+            Z = int(chk//1e3)
+            N = int(chk - Z*1e3)
         elif name is not None:
-            self.name = name.lower()
-            self.Name = name[0].upper() + name[1:].lower()
-            self.N, self.Z = getNZ(self.name)
+            N, Z = getNZ(name)
         elif Z is not None and N is not None:
-            self.Z = int(Z)
-            self.N = int(N)
-            self.A = int(Z + N)
-            self._get_Name()
+            Z, N = int(Z), int(N)
         else:
             raise(ValueError("Give either name or Z and N of isotope"))
+        return _intern(N, Z)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Isotope is immutable")
+
+    def __reduce__(self):
+        return _intern, (self.N, self.Z)
+
+    @property
+    def A(self):
+        return self.N + self.Z
+
+    @property
+    def chk(self):
+        return self.Z*1000 + self.N
 
-        # Special cases
-        if self.name == 'p':
-            self.name = 'h1'
-        if self.name == 'n' or self.name == 'neutrons':
-            self.name = 'neutron'
-        if self.name == 'd':
-            self.name = 'h2'
-        if self.name == 't':
-            self.name = 'h3'
+    @property
+    def el(self):
+        return ELNAMES[self.Z]
 
-        self.Y = Y
+    @property
+    def El(self):
+        return self.el[0].upper() + self.el[1:]
 
-    def _get_Name(self):
-        self.el = Elnames[self.Z]
-        self.El = self.el[0].upper() + self.el[1:]
+    @property
+    def name(self):
+        # special names (n, p, d, t) are resolved by getName
+        return getName(self.N, self.Z)
 
-        self.name = self.el + str(self.A)
-        self.Name = self.El + str(self.A)
+    @property
+    def Name(self):
+        name = self.name
+        return name[0].upper() + name[1:]
 
     def __repr__(self):
-        repr = "Isotope: {}".format(self.Name)
-        if not np.isnan(self.Y):
-            repr += ": Abundance: {}".format(self.Y)
-        return repr
+        return "Isotope: {}".format(self.Name)
 
     def __str__(self):
         return self.name
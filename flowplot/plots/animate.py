@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.animation import FuncAnimation
+from .. import np
+from ..flow import FlowFile
+from .utils import TimeDensTempBox, plotMagicNumbers, plotStableIsotopes, _boxText
+from .flowplot import FlowCollectionPlot
+from .snapplot import IsotopeCollectionPlot
+
+
+class FlowAnimator(object):
+    '''
+    Animates the flowfiles of a run like plotFlowFile, one file per frame.
+    Grid, magic numbers, stable isotopes, colorbars and the text box are drawn once,
+    every frame only updates the abundances, the arrows and the text.
+    The next flowfiles are read in a background thread.
+    Input:
+       ax          - matplotlib.Axes() object
+       paths       - paths of the flowfiles in order of the frames, e.g. from ScanDir
+       bounds      - (optional) (Nmin, Nmax, Zmin, Zmax) of the view,
+                     defaults to the bounds of the first and last flowfile
+       prefetch    - (optional) number of flowfiles read ahead
+       iso_kwargs  - (optional) kwargs for IsotopeCollectionPlot
+       flow_kwargs - (optional) kwargs for FlowCollectionPlot
+       kwargs are passed to FlowFile
+    Attributes:
+    - isos, flows  - the IsotopeCollectionPlot and FlowCollectionPlot
+    - box          - the text of the TimeDensTempBox
+    - artists      - everything that changes or is drawn on top of the abundances,
+                     redrawn every frame when blitting
+    Methods:
+    - update
+    - animate
+    - close
+    '''
+
+    def __init__(self, ax, paths, bounds=None, prefetch=2, iso_kwargs=None, flow_kwargs=None, **kwargs):
+        self.ax = ax
+        self.paths = list(paths)
+        self.prefetch = prefetch
+        self.kwargs = kwargs
+        self.pool = ThreadPoolExecutor(1)
+        self.pending = {}
+
+        ff = FlowFile(self.paths[0], **kwargs)
+        if bounds is None:
+            last = FlowFile(self.paths[-1], **kwargs) if len(self.paths) > 1 else ff
+            lo = np.minimum(ff.getBounds(), last.getBounds())
+            hi = np.maximum(ff.getBounds(), last.getBounds())
+            bounds = (lo[0], hi[1], lo[2], hi[3])
+        self.bounds = tuple(int(b) for b in bounds)
+
+        iso_kwargs = dict({'cmap': 'Greys'}, **(iso_kwargs or {}))
+        flow_kwargs = dict({'lw': .5}, **(flow_kwargs or {}))
+        self.box = TimeDensTempBox(ax, ff)
+        stable = plotStableIsotopes(ax)
+        self.isos = IsotopeCollectionPlot(ax, ff, grid=False, **iso_kwargs)
+        self.isos.addGrid(*self.bounds)
+        self.flows = FlowCollectionPlot(ax, ff, **flow_kwargs)
+        self.isos.addColorBar(xshift=-.18)
+        self.flows.addColorBar()
+        magic = plotMagicNumbers(ax)
+        ax.axis(self.bounds)
+
+        self.frame = 0
+        self.artists = [self.isos.im] + self.isos.grid + [stable, self.flows.Patches] + magic + [self.box]
+
+    def _get(self, frame):
+        '''
+        returns the FlowFile of frame and starts reading the following ones
+        '''
+        for ii in range(frame, min(frame+self.prefetch+1, len(self.paths))):
+            if ii not in self.pending:
+                self.pending[ii] = self.pool.submit(FlowFile, self.paths[ii], **self.kwargs)
+        for ii in [ii for ii in self.pending if ii < frame or ii > frame+self.prefetch]:
+            self.pending.pop(ii).cancel()
+        return self.pending.pop(frame).result()
+
+    def update(self, frame):
+        '''
+        shows flowfile number frame of paths
+        returns the artists that changed, as needed by FuncAnimation
+        '''
+        ff = self._get(frame)
+        self.isos.update(ff)
+        arrows = self.artists.index(self.flows.Patches)
+        self.artists[arrows] = self.flows.update(ff)
+        self.box.set_text(_boxText(ff))
+        self.frame = frame
+        return self.artists
+
+    def animate(self, frames=None, blit=True, **kwargs):
+        '''
+        returns a matplotlib FuncAnimation showing the frames (default all paths),
+        e.g. animate().save('flows.mp4')
+        kwargs are passed to FuncAnimation
+        '''
+        if frames is None:
+            frames = range(len(self.paths))
+        kwargs.setdefault('cache_frame_data', False)
+        return FuncAnimation(self.ax.figure, self.update, frames=frames, blit=blit, **kwargs)
+
+    def close(self):
+        '''
+        stops the prefetch thread
+        '''
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.pool.shutdown()
+
+    def __repr__(self):
+        return "FlowAnimator: {} frames".format(len(self.paths))
@@ -1,8 +1,12 @@
-from matplotlib.collections import PatchCollection
+from matplotlib.collections import PatchCollection, PolyCollection
 from matplotlib.patches import FancyArrow, Rectangle
-from . import inset_axes
-from . import LogNorm, cm, plt
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 from .. import np
+from ..profiling import instrument
+from ..flow.flowcollection import _netFlows
+from ..flow.isotopecollection import _key
 
 
 class FlowCollectionPlot(object):
@@ -17,15 +21,37 @@ class FlowCollectionPlot(object):
     - norm:            LogNorm(1e-flow_range, 1) (*MaxFlow if not normalized)
     - cmap:            'jet'
     - scale_arrows:    True
-    - kwargs for FancyArrow
+    - fast:            True, draw all arrows as one PolyCollection
+                       instead of a PatchCollection of FancyArrows
+    - lod:             False, only draw flows in the visible part of the axes and redraw
+                       when the axes limits change, implies fast
+                       if more than max_arrows flows are visible, flows between cells of
+                       2x2, 4x4, ... isotopes are summed up to net arrows between the cells
+    - max_arrows:      5000
+    - cell:            8, size of the buckets of the spatial index used by lod
+    - net:             False, draw the net flows (see FlowCollection.net),
+                       a flow and its reverse flow become one arrow
+    - kwargs for FancyArrow (PolyCollection if fast)
+    Methods:
+    - update
+    - addColorBar
     '''
 
-    def __init__(self, ax, flowcollection, frange=2, normalized=True, scale_arrows=True, **kwargs):
+    @instrument(rows=lambda result, args: len(args['self'].flowcollection.flow))
+    def __init__(self, ax, flowcollection, frange=2, normalized=True, scale_arrows=True, fast=True,
+                 lod=False, max_arrows=5000, cell=8, net=False, **kwargs):
         self.ax = ax
+        self.net = net
+        if net:
+            flowcollection = flowcollection.net()
         self.flowcollection = flowcollection
         self.normalized = normalized
         self.frange = frange
         self.scale_arrows = scale_arrows
+        self.fast = fast or lod
+        self.lod = lod
+        self.max_arrows = max_arrows
+        self.cell = cell
         self.MaxFlow = flowcollection.getMaxFlow()
         self.MinFlow = flowcollection.getMinFlow()
 
@@ -39,26 +65,87 @@ class FlowCollectionPlot(object):
                 self.norm = kwargs.pop('norm', LogNorm(10**(-frange), 1, clip=True))
             else:
                 self.norm = kwargs.pop('norm', LogNorm(self.MaxFlow*10**(-frange), self.MaxFlow, clip=True))
-        self.cmap = cm.get_cmap(kwargs.pop('cmap', 'jet'))
+        self.cmap = plt.get_cmap(kwargs.pop('cmap', 'jet'))
 
         self.ax.axis(self.flowcollection.getBounds())
         kwargs.setdefault('lw', .3)
+        self.kwargs = kwargs
 
-        Arrows = []
-        Acol = []
-        if normalized:
-            flows = np.vectorize(lambda f: f.flow / self.MaxFlow)(self.flowcollection.flows)
+        flows, mask = self._normedFlows()
+        if lod:
+            self.Patches = self._arrowCollection(flows, np.zeros(len(flows), dtype=bool), kwargs)
+            self._buildIndex(flows, mask)
+            self._drawView()
+            self._cids = [self.ax.callbacks.connect(lim, self._drawView)
+                          for lim in ('xlim_changed', 'ylim_changed')]
+        elif fast:
+            self.Patches = self._arrowCollection(flows, mask, kwargs)
         else:
-            flows = np.vectorize(lambda f: f.flow)(self.flowcollection.flows)
+            self.Patches = self._patchCollection(flows, mask, kwargs)
+        self.ax.add_collection(self.Patches, )
 
-        for fl, flow in zip(flows, self.flowcollection.flows):
-            if frange != 'all' and self.norm(fl) <= 0:
-                continue
+    def _normedFlows(self):
+        '''
+        returns the flows (relative to MaxFlow if normalized) and the mask of flows to draw
+        '''
+        if self.normalized:
+            flows = self.flowcollection.flow / self.MaxFlow
+        else:
+            flows = self.flowcollection.flow
+        if self.frange != 'all':
+            flows_normed = np.ma.filled(self.norm(flows), 0)
+            mask = flows_normed > 0
+        else:
+            mask = np.ones(len(flows), dtype=bool)
+        return flows, mask
 
-            if scale_arrows:
-                width = .2*self.norm(fl) + 0.01
-            else:
-                width = .15
+    @instrument(rows=lambda result, args: len(args['self'].flowcollection.flow))
+    def update(self, flowcollection):
+        '''
+        replaces the arrows by the flows of flowcollection,
+        norm, axes limits and colorbar are kept
+        returns the collection of arrows
+        '''
+        if self.net:
+            flowcollection = flowcollection.net()
+        self.flowcollection = flowcollection
+        self.MaxFlow = flowcollection.getMaxFlow()
+        self.MinFlow = flowcollection.getMinFlow()
+        flows, mask = self._normedFlows()
+        if self.lod:
+            self._buildIndex(flows, mask)
+            self._drawView()
+        elif self.fast:
+            col = self.flowcollection
+            verts, flows, _ = self._arrowVerts(col.N0[mask], col.Z0[mask], col.dN[mask], col.dZ[mask],
+                                               flows[mask], self.kwargs)
+            self.Patches.set_verts(verts)
+            self.Patches.set_array(flows)
+        else:
+            self.Patches.remove()
+            self.Patches = self._patchCollection(flows, mask, self.kwargs)
+            self.ax.add_collection(self.Patches, )
+            if hasattr(self, 'cbar'):
+                self.cbar.update_normal(self.Patches)
+        return self.Patches
+
+    def _arrowWidths(self, flows):
+        '''
+        returns width of the arrow shafts for flows
+        '''
+        if self.scale_arrows:
+            return .2*np.ma.filled(self.norm(flows), 0) + 0.01
+        return np.full(len(flows), .15)
+
+    @instrument(rows=lambda result, args: len(result.get_paths()))
+    def _patchCollection(self, flows, mask, kwargs):
+        '''
+        returns a PatchCollection with one FancyArrow per flow
+        '''
+        Arrows = []
+        col = self.flowcollection
+        for fl, width, N0, Z0, dN, dZ in zip(flows[mask], self._arrowWidths(flows[mask]),
+                                             col.N0[mask], col.Z0[mask], col.dN[mask], col.dZ[mask]):
             st = {"ec": 'k',
                   "width": width,
                   "head_width": 2.5*width,
@@ -67,16 +154,131 @@ class FlowCollectionPlot(object):
             for kv in st.items():
                 nkwargs.setdefault(*kv)
 
-            ar = FancyArrow(flow.N0, flow.Z0, flow.dN, flow.dZ,
+            ar = FancyArrow(N0, Z0, dN, dZ,
                             length_includes_head=True,
                             **nkwargs)
             Arrows.append(ar)
-            Acol.append(fl)
-        Arrows = np.array(Arrows)
-        Acol = np.array(Acol)
-        self.Patches = PatchCollection(Arrows, norm=self.norm, cmap=self.cmap, match_original=True)
-        self.Patches.set_array(Acol)
-        self.ax.add_collection(self.Patches, )
+        Patches = PatchCollection(Arrows, norm=self.norm, cmap=self.cmap, match_original=True)
+        Patches.set_array(flows[mask])
+        return Patches
+
+    def _arrowVerts(self, x, y, dx, dy, flows, kwargs, scale=1):
+        '''
+        returns the (n_flows, 7, 2) vertices of the arrows from (x, y) to (x+dx, y+dy) computed at once,
+        the flows that are drawn and the kwargs left for the PolyCollection
+        widths and head lengths are multiplied by scale
+        '''
+        length = np.hypot(dx, dy)
+        keep = length > 0
+        x, y, dx, dy, flows, length = x[keep], y[keep], dx[keep], dy[keep], flows[keep], length[keep]
+
+        kwargs = kwargs.copy()
+        width = np.broadcast_to(kwargs.pop('width', self._arrowWidths(flows)), length.shape)
+        hw = np.broadcast_to(kwargs.pop('head_width', 2.5*width), length.shape)
+        hl = np.broadcast_to(kwargs.pop('head_length', .5), length.shape)
+        width, hw, hl = width*scale, hw*scale, hl*scale
+        kwargs.setdefault('ec', 'k')
+
+        # arrows pointing along x with the tip at (0, 0) like FancyArrow
+        along = np.stack([0*hl, -hl, -hl, -length, -length, -hl, -hl], axis=1)
+        across = np.stack([0*hw, -hw/2, -width/2, -width/2, width/2, width/2, hw/2], axis=1)
+        # rotate into direction of the flow and move the tip to the product
+        cx, sx = (dx/length)[:, None], (dy/length)[:, None]
+        verts = np.empty(along.shape + (2,))
+        verts[..., 0] = cx*along - sx*across + (x + dx)[:, None]
+        verts[..., 1] = sx*along + cx*across + (y + dy)[:, None]
+        return verts, flows, kwargs
+
+    @instrument(rows=lambda result, args: len(result.get_paths()))
+    def _arrowCollection(self, flows, mask, kwargs):
+        '''
+        returns a PolyCollection with the same arrows as _patchCollection
+        '''
+        col = self.flowcollection
+        verts, flows, kwargs = self._arrowVerts(col.N0[mask], col.Z0[mask], col.dN[mask], col.dZ[mask],
+                                                flows[mask], kwargs)
+        Patches = PolyCollection(verts, norm=self.norm, cmap=self.cmap, **kwargs)
+        Patches.set_array(flows)
+        return Patches
+
+    def _buildIndex(self, flows, mask):
+        '''
+        sorts the flows[mask] into buckets of cell x cell isotopes by their start point,
+        flows longer than a cell are kept in a separate list that is checked for every view
+        '''
+        col = self.flowcollection
+        inds = np.flatnonzero(mask)
+        long = np.maximum(np.abs(col.dN[inds]), np.abs(col.dZ[inds])) >= self.cell
+        self._long, inds = inds[long], inds[~long]
+        self._nbZ = int(col.Z0[inds].max()//self.cell) + 1 if len(inds) else 1
+        keys = (col.N0[inds]//self.cell)*self._nbZ + col.Z0[inds]//self.cell
+        order = np.argsort(keys, kind='stable')
+        self._bucket_keys, self._bucket_inds = keys[order], inds[order]
+        self._flows = flows
+        self._view = None
+
+    def _visible(self, xmin, xmax, ymin, ymax):
+        '''
+        returns the indices of the flows in the buckets that can reach into the window
+        and of the long flows whose bounding box overlaps it
+        '''
+        # bucketed flows reach less than a cell (plus the arrow head) out of their bucket
+        cell = reach = self.cell
+        col = self.flowcollection
+        N0, Z0, dN, dZ = col.N0[self._long], col.Z0[self._long], col.dN[self._long], col.dZ[self._long]
+        overlap = ((np.minimum(N0, N0+dN) - 1 <= xmax) & (np.maximum(N0, N0+dN) + 1 >= xmin)
+                   & (np.minimum(Z0, Z0+dZ) - 1 <= ymax) & (np.maximum(Z0, Z0+dZ) + 1 >= ymin))
+        long = self._long[overlap]
+        bN = np.arange(max(int((xmin-reach)//cell), 0), int((xmax+reach)//cell) + 1)
+        bZmin = max(int((ymin-reach)//cell), 0)
+        bZmax = min(int((ymax+reach)//cell), self._nbZ-1)
+        if bZmax < bZmin:
+            return long
+        # the buckets of one column of N are contiguous in the sorted keys
+        lo = np.searchsorted(self._bucket_keys, bN*self._nbZ + bZmin, side='left')
+        hi = np.searchsorted(self._bucket_keys, bN*self._nbZ + bZmax, side='right')
+        counts = hi - lo
+        pos = np.arange(counts.sum()) + np.repeat(lo - np.cumsum(counts) + counts, counts)
+        return np.concatenate((self._bucket_inds[pos], long))
+
+    def _aggregate(self, x, y, dx, dy, flows, scale):
+        '''
+        returns start points, directions and flows of the net flows
+        between cells of scale x scale isotopes, flows within a cell are dropped
+        '''
+        cin = _key(x//scale, y//scale)
+        cout = _key((x+dx)//scale, (y+dy)//scale)
+        cross = cin != cout
+        cells, inverse = np.unique(np.concatenate((cin[cross], cout[cross])), return_inverse=True)
+        ncross = np.count_nonzero(cross)
+        iso_in, iso_out, flows = _netFlows(inverse[:ncross], inverse[ncross:], flows[cross], len(cells))
+        cZ, cN = np.divmod(cells, 1000)
+        cN = cN*scale + (scale-1)/2
+        cZ = cZ*scale + (scale-1)/2
+        return cN[iso_in], cZ[iso_in], cN[iso_out]-cN[iso_in], cZ[iso_out]-cZ[iso_in], flows
+
+    @instrument(rows=lambda result, args: len(args['self'].Patches.get_paths()))
+    def _drawView(self, ax=None):
+        '''
+        sets the arrows to the flows in the current axes limits,
+        aggregated to coarser cells while there are more than max_arrows
+        '''
+        xmin, xmax = sorted(self.ax.get_xlim())
+        ymin, ymax = sorted(self.ax.get_ylim())
+        if self._view == (xmin, xmax, ymin, ymax):
+            return
+        self._view = (xmin, xmax, ymin, ymax)
+        col = self.flowcollection
+        inds = self._visible(xmin, xmax, ymin, ymax)
+        view = col.N0[inds], col.Z0[inds], col.dN[inds], col.dZ[inds], self._flows[inds]
+        arrows, scale = view, 1
+        while len(arrows[-1]) > self.max_arrows:
+            scale *= 2
+            arrows = self._aggregate(*view, scale)
+        self.scale = scale
+        verts, flows, _ = self._arrowVerts(*arrows, self.kwargs, scale=scale)
+        self.Patches.set_verts(verts)
+        self.Patches.set_array(flows)
 
     def addColorBar(self, xshift=-.06, yshift=.01, loc='lower right', **kwargs):
         '''
@@ -1,33 +1,91 @@
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 from .. import np
-from . import plt, LogNorm
-from . import inset_axes
+from ..profiling import instrument
 
 
 class IsotopeCollectionPlot(object):
     '''
+    arguments:
+    - ax                 - matplotlib.Axes() object
+    - isotopecollection  - IsotopeCollection object or (N, Z) array of abundances,
+                           e.g. a slice of a SnapshotSeries
+    - ymin               - minimum abundance to be plotted,
+                           defaults to isotopecollection.ymin (1e-10 for arrays)
     kwargs: same as imshow
     - norm defaults to LogNorm(1e-10,10**(ceil(log10(MaxY))))
     - cmap defaults to 'jet'
     '''
 
-    def __init__(self, ax, isotopecollection, grid=True, **kwargs):
+    @instrument()
+    def __init__(self, ax, isotopecollection, grid=True, ymin=None, **kwargs):
         self.ax = ax
-        self.isotopecollection = isotopecollection
-        MaxY = isotopecollection.getMaxY()
+        if ymin is None:
+            ymin = 1e-10 if isinstance(isotopecollection, np.ndarray) else isotopecollection.ymin
+        self.ymin = ymin
+        self.Yarray = np.zeros((0, 0))
+        self._fill(isotopecollection)
+        if self.isotopecollection is None:
+            Ns, Zs = np.nonzero(self.Yarray >= ymin)
+            Xmin, Xmax, Ymin, Ymax = Ns.min(), Ns.max(), Zs.min(), Zs.max()
+        else:
+            Xmin, Xmax, Ymin, Ymax = isotopecollection.getBounds()
+        MaxY = np.nanmax(self.Yarray)
         kwargs.setdefault('norm', LogNorm(1e-10, 10**(int((np.log10(MaxY)))), clip=True))
         kwargs.setdefault('cmap', 'jet')
-        Xmin, Xmax, Ymin, Ymax = isotopecollection.getBounds()
+        self.grid = []
         if grid:
-            ax.vlines([x+.5 for x in range(Xmin-10, Xmax+10)], Ymin-10, Ymax+10, color='k', lw=.2)
-            ax.hlines([y+.5 for y in range(Ymin-10, Ymax+10)], Xmin-10, Xmax+10, color='k', lw=.2)
-        self.Yarray = np.empty((Xmax+1, Ymax+1))
-        self.Yarray.fill(np.nan)
-        for iso in isotopecollection.isotopes:
-            if iso.Y >= isotopecollection.ymin:
-                self.Yarray[iso.N, iso.Z] = iso.Y
+            self.addGrid(Xmin, Xmax, Ymin, Ymax)
         # self.Yarray = np.log10(self.Yarray)
         self.im = ax.imshow(self.Yarray.T, origin='lower', **kwargs)
 
+    def addGrid(self, Xmin, Xmax, Ymin, Ymax):
+        '''
+        draws lines between the isotopes from N=Xmin to Xmax and Z=Ymin to Ymax
+        with a margin of 10
+        returns list of the line collections
+        '''
+        self.grid += [self.ax.vlines([x+.5 for x in range(Xmin-10, Xmax+10)], Ymin-10, Ymax+10, color='k', lw=.2),
+                      self.ax.hlines([y+.5 for y in range(Ymin-10, Ymax+10)], Xmin-10, Xmax+10, color='k', lw=.2)]
+        return self.grid
+
+    def _fill(self, isotopecollection):
+        '''
+        puts the abundances of isotopecollection into Yarray, nan below ymin,
+        Yarray is reused if it is large enough
+        '''
+        if isinstance(isotopecollection, np.ndarray):
+            self.isotopecollection = None
+            Ns, Zs = np.nonzero(isotopecollection)
+            Ys = isotopecollection[Ns, Zs]
+            shape = isotopecollection.shape
+        else:
+            self.isotopecollection = isotopecollection
+            Ns, Zs, Ys = isotopecollection.N, isotopecollection.Z, isotopecollection.Y
+            shape = (Ns.max()+1, Zs.max()+1) if len(Ns) else (1, 1)
+        if shape[0] > self.Yarray.shape[0] or shape[1] > self.Yarray.shape[1]:
+            self.Yarray = np.zeros(np.maximum(shape, self.Yarray.shape))
+        else:
+            self.Yarray[:] = 0
+        self.Yarray[Ns, Zs] = Ys
+        self.Yarray[~(self.Yarray >= self.ymin)] = np.nan
+
+    @instrument()
+    def update(self, isotopecollection):
+        '''
+        replaces the abundances by those of isotopecollection (or (N, Z) array),
+        norm and grid are kept
+        returns the image
+        '''
+        shape = self.Yarray.shape
+        self._fill(isotopecollection)
+        self.im.set_data(self.Yarray.T)
+        if self.Yarray.shape != shape:
+            nN, nZ = self.Yarray.shape
+            self.im.set_extent((-.5, nN-.5, -.5, nZ-.5))
+        return self.im
+
     def addColorBar(self, xshift=-.06, yshift=0, loc='lower right', **kwargs):
         '''
         adds a colorbar as inset at location loc
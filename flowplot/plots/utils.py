@@ -0,0 +1,103 @@
+import matplotlib.pyplot as plt
+import matplotlib.cm as cm
+from matplotlib.colors import Normalize, LogNorm
+from matplotlib.colorbar import ColorbarBase
+from mpl_toolkits.axes_grid1 import make_axes_locatable
+from mpl_toolkits.axes_grid1.inset_locator import inset_axes
+from .. import os, np, St_N, St_Z
+from ..flow import FlowFile
+from ..flow.snapshot import Snapshot
+from .flowplot import FlowCollectionPlot
+from .snapplot import IsotopeCollectionPlot
+
+'''
+Contains the plotting utility routines:
+- TimeDensTempBox
+- plotMagicNumbers
+- plotStableIsotopes
+- plotFlowFile
+- plotSnapshot
+'''
+
+
+def _boxText(file):
+    '''
+    returns the text of the TimeDensTempBox of flowfile or snapshot
+    '''
+    text = r'time: {:5.2e}$\,$ms'+'\n'
+    text += r'dens: {:5.2e}$\,$g/cm$^3$'+'\n'
+    text += r'temp: {:5.2f}$\,$GK'
+    return text.format(file.time*1e-3, file.dens, file.temp)
+
+
+def TimeDensTempBox(ax, file, **kwargs):
+    '''
+    plot a box with metainfo from flowfile or snapshot
+    '''
+    text = ax.text(0.02, 0.98, _boxText(file),
+                   horizontalalignment='left',
+                   verticalalignment='top',
+                   transform=ax.transAxes,
+                   bbox=dict(facecolor='w', edgecolor='k', boxstyle='round'),
+                   **kwargs)
+    return text
+
+
+def plotMagicNumbers(ax, x=True, y=True,  color='k', lw=.3):
+    '''
+    routine for ploting lines at magic numbers
+    returns list of lines
+    '''
+    ixymagic = [2, 8, 20, 28, 50, 82, 126]
+    lines = []
+    for mn in ixymagic:
+        if y:
+            lines.append(ax.axhline(y=mn-.5, color=color, lw=lw))
+            lines.append(ax.axhline(y=mn+.5, color=color, lw=lw))
+        if x:
+            lines.append(ax.axvline(x=mn-.5, color=color, lw=lw))
+            lines.append(ax.axvline(x=mn+.5, color=color, lw=lw))
+    return lines
+
+
+def plotStableIsotopes(ax, **kwargs):
+    '''
+    routine for ploting the positions of stable isotopes
+    '''
+    default = {'color': 'k',
+               's': 30}
+    for k, s in default.items():
+        kwargs.setdefault(k, s)
+    im = ax.scatter(St_N, St_Z, **kwargs)
+    return im
+
+
+def plotFlowFile(ax, path):
+    '''
+    wrapper for quickly plotting flows from flowfile at path
+    '''
+    ff = FlowFile(path)
+
+    TimeDensTempBox(ax, ff)
+    plotStableIsotopes(ax)
+
+    isos = IsotopeCollectionPlot(ax, ff, cmap='Greys')
+    flows = FlowCollectionPlot(ax, ff, lw=.5,)
+    isos.addColorBar(xshift=-.18)
+    flows.addColorBar()
+    plotMagicNumbers(ax)
+
+
+def plotSnapshot(ax, path):
+    '''
+    wrapper for quickly plotting abundances from snapshot at path
+    '''
+    sn = Snapshot(path)
+
+    TimeDensTempBox(ax, sn)
+    plotStableIsotopes(ax)
+
+    isos = IsotopeCollectionPlot(ax, sn)
+    isos.addColorBar()
+    plotMagicNumbers(ax)
+    ax.axis(sn.getBounds())
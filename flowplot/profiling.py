@@ -0,0 +1,226 @@
+'''
+Opt-in instrumentation of the load, merge, sort and plot stages
+
+The stages are functions and methods decorated with instrument.
+Methods are only replaced by timing wrappers while profiling is on, otherwise they are left untouched.
+Functions are imported by name into other namespaces, so they keep a wrapper
+that only checks whether profiling is on.
+Profiling is switched on
+- for the whole process by the environment variable FLOWPLOT_PROFILE,
+  the report is printed to stderr at exit, or written to FLOWPLOT_PROFILE if it ends with .json,
+  FLOWPLOT_PROFILE_MEMORY=1 also records allocated bytes
+- for a block by the context manager profile:
+
+    with profile(memory=True, cprofile='load.prof') as report:
+        ff = FlowFile(path)
+    print(report)
+    report.stats['FlowFile.__init__']['time']
+
+Stages that run in worker processes (IntegrateFlows with workers > 1) are not recorded.
+'''
+import atexit
+import functools
+import inspect
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# instrumented functions: original -> (stage, rows)
+_registry = {}
+# timing wrappers of the instrumented functions: original -> wrapper
+_wrappers = {}
+# instrumented methods, replaced by their wrappers while profiling is on
+_methods = []
+# report of the running profile, None while profiling is off
+_report = None
+
+
+class Report(object):
+    '''
+    Statistics per stage of a profile
+    Attributes:
+    - stats   - dict of stage: dict(calls, time, rows, bytes)
+                time is the wall time in seconds including nested stages,
+                rows the number of rows (flows, isotopes or table lines) processed,
+                bytes the memory allocated by the stage and still held after it (only with memory)
+    - memory  - True if allocated bytes are recorded
+    Methods:
+    - add
+    - json
+    - save
+    '''
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.stats = {}
+
+    def add(self, stage, elapsed, rows=0, allocated=0):
+        '''
+        add a call of stage to the statistics
+        '''
+        entry = self.stats.setdefault(stage, dict(calls=0, time=0., rows=0, bytes=0))
+        entry['calls'] += 1
+        entry['time'] += elapsed
+        entry['rows'] += rows
+        entry['bytes'] += allocated
+
+    def json(self):
+        '''
+        returns the statistics as json string
+        '''
+        import json
+        return json.dumps(self.stats, indent=1, sort_keys=True)
+
+    def save(self, path):
+        '''
+        writes the statistics to path as json
+        '''
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp, 'w') as ff:
+            ff.write(self.json())
+        os.replace(tmp, path)
+
+    def __str__(self):
+        lines = ["{:40s} {:>7s} {:>10s} {:>10s} {:>10s}".format('stage', 'calls', 'time [s]', 'rows', 'MB')]
+        for stage, entry in sorted(self.stats.items(), key=lambda item: -item[1]['time']):
+            lines.append("{:40s} {:7d} {:10.4f} {:10d} {:10.2f}".format(
+                stage, entry['calls'], entry['time'], entry['rows'], entry['bytes']/2**20))
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return "Report: {} stages".format(len(self.stats))
+
+
+def _wrap(func):
+    '''
+    returns the timing wrapper of the instrumented function func
+    '''
+    if func in _wrappers:
+        return _wrappers[func]
+    stage, rows = _registry[func]
+    signature = inspect.signature(func)
+
+    def count(result, args, kwargs):
+        # counting must never change the outcome of the call
+        try:
+            return int(rows(result, signature.bind(*args, **kwargs).arguments))
+        except Exception:
+            return 0
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        report = _report
+        if report is None:
+            # called through a reference taken while profiling was on
+            return func(*args, **kwargs)
+        before = tracemalloc.get_traced_memory()[0] if report.memory else 0
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        allocated = tracemalloc.get_traced_memory()[0] - before if report.memory else 0
+        report.add(stage, elapsed, count(result, args, kwargs) if rows is not None else 0, allocated)
+        return result
+
+    _wrappers[func] = wrapper
+    return wrapper
+
+
+def _replace(old, new):
+    '''
+    replace old by new in the namespaces of all flowplot modules and their classes
+    '''
+    for name, module in list(sys.modules.items()):
+        if module is None or (name != 'flowplot' and not name.startswith('flowplot.')):
+            continue
+        for attr, value in list(vars(module).items()):
+            if value is old:
+                setattr(module, attr, new)
+            elif isinstance(value, type) and value.__module__ == name:
+                for cattr, cvalue in list(vars(value).items()):
+                    if cvalue is old:
+                        setattr(value, cattr, new)
+
+
+def instrument(stage=None, rows=None):
+    '''
+    decorator marking a function or method as stage of the profile
+    stage - name of the stage, defaults to the qualified name of the function
+    rows  - (optional) function called as rows(result, args) returning the number of rows processed,
+            args is a dict of the arguments of the call by name, e.g. args['self'],
+            if it fails the call counts 0 rows
+    '''
+    def decorate(func):
+        _registry[func] = (stage or func.__qualname__, rows)
+        if '.' not in func.__qualname__:
+            return _wrap(func)
+        _methods.append(func)
+        if _report is not None:
+            return _wrap(func)
+        return func
+    return decorate
+
+
+def _start(report):
+    global _report
+    _report = report
+    for func in _methods:
+        _replace(func, _wrap(func))
+
+
+def _stop():
+    global _report
+    _report = None
+    for func in _methods:
+        _replace(_wrap(func), func)
+
+
+@contextmanager
+def profile(memory=False, cprofile=None, snapshot=None):
+    '''
+    context manager recording the stages run in the block,
+    yields the Report
+    memory   - record the bytes allocated by every stage with tracemalloc
+    cprofile - (optional) path, the block is also profiled with cProfile and its stats dumped there
+    snapshot - (optional) path, a tracemalloc snapshot at the end of the block is dumped there
+    '''
+    if _report is not None:
+        raise RuntimeError("Profiling is already on")
+    report = Report(memory=memory)
+    tracing = (memory or snapshot is not None) and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    profiler = None
+    if cprofile is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+    _start(report)
+    try:
+        if profiler is not None:
+            profiler.enable()
+        yield report
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile)
+        if snapshot is not None:
+            tracemalloc.take_snapshot().dump(snapshot)
+        _stop()
+        if tracing:
+            tracemalloc.stop()
+
+
+def _atExit(target):
+    report = _report
+    if target.endswith('.json'):
+        report.save(target)
+    else:
+        print(report, file=sys.stderr)
+
+
+if os.environ.get('FLOWPLOT_PROFILE'):
+    _report = Report(memory=bool(os.environ.get('FLOWPLOT_PROFILE_MEMORY')))
+    if _report.memory:
+        tracemalloc.start()
+    atexit.register(_atExit, os.environ['FLOWPLOT_PROFILE'])
@@ -7,6 +7,8 @@ setup(
     author_email="mjacobi@theorie.ikp.physik.tu-darmstadt.de",
     packages=['flowplot', 'flowplot/plots', 'flowplot/flow'],
     include_package_data=True,
+    install_requires=['numpy', 'scipy', 'matplotlib'],
+    entry_points={'console_scripts': ['flowplot=flowplot.cli:main']},
     long_description=open('README.md').read(),
     description="Some scripts to plot flows from WinNet"
 )
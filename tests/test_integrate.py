@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from flowplot.flow import FlowFile
+from flowplot.flow.flowcollection import FlowCollection
+from flowplot.flow.integrate import IncrementalIntegrator, IntegrateFlows
+
+
+def _writeFlowFile(path, num, temp):
+    col = FlowCollection()
+    col.addFlowFromZN(10, 8, 1e-3, 11, 8, 1e-3, 1e-5*num)
+    col.writeFlowFile(os.path.join(path, 'flow_{:04d}.dat'.format(num)), time=float(num), temp=temp)
+
+
+def test_update_without_files_in_range(tmp_path):
+    path = str(tmp_path)
+    _writeFlowFile(path, 1, temp=5.)
+    integrator = IncrementalIntegrator(path, Tmax=3)
+    assert integrator.update() is None
+    assert integrator.added == [os.path.join(path, 'flow_0001.dat')]
+
+    # the hot file is in the manifest and not read again
+    _writeFlowFile(path, 2, temp=1.)
+    total = integrator.update()
+    assert integrator.added == [os.path.join(path, 'flow_0002.dat')]
+    assert total.flow.tolist() == FlowFile(os.path.join(path, 'flow_0002.dat')).flow.tolist()
+
+    # a later file outside of the range keeps the sum
+    _writeFlowFile(path, 3, temp=5.)
+    assert integrator.update().flow.tolist() == total.flow.tolist()
+    assert integrator.update().flow.tolist() == total.flow.tolist()
+    assert integrator.added == []
+
+
+def test_single_file_is_netted(tmp_path):
+    path = str(tmp_path)
+    col = FlowCollection()
+    col.addFlowFromZN(10, 8, 1e-3, 11, 8, 1e-3, 3e-5)
+    col.addFlowFromZN(11, 8, 1e-3, 10, 8, 1e-3, 1e-5)
+    col.writeFlowFile(os.path.join(path, 'flow_0001.dat'), time=1.)
+    col.writeFlowFile(os.path.join(path, 'flow_0002.dat'), time=2.)
+
+    one = IntegrateFlows([os.path.join(path, 'flow_0001.dat')], quite=True)
+    two = IntegrateFlows([os.path.join(path, 'flow_0001.dat'), os.path.join(path, 'flow_0002.dat')],
+                         quite=True)
+    assert type(one) is type(two) is FlowCollection
+    assert one.flow.tolist() == pytest.approx([2e-5])
+    assert two.flow.tolist() == pytest.approx([4e-5])